@@ -0,0 +1,44 @@
+"""
+In-memory cache of extraction results keyed by upload content.
+"""
+from collections import OrderedDict
+from typing import Optional
+
+import xxhash
+
+
+class ExtractionCache:
+    """
+    Small LRU cache mapping image bytes to extracted receipt fields.
+    
+    Re-submitted receipts (client retries, duplicate expense entries) are
+    answered without re-running OCR. Keys are 64-bit xxh3 hashes: collision
+    resistance is not needed here and xxh3 hashes far faster than the
+    upload can be OCR'd. Only used from the event loop thread, so no locking.
+    """
+    
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()
+    
+    @staticmethod
+    def key_for(content: bytes) -> int:
+        """Hash upload bytes into a cache key."""
+        return xxhash.xxh3_64_intdigest(content)
+    
+    def get(self, key: int) -> Optional[dict]:
+        """Return cached fields for key (marking it recently used), or None."""
+        extracted = self._entries.get(key)
+        if extracted is not None:
+            self._entries.move_to_end(key)
+        return extracted
+    
+    def put(self, key: int, extracted: dict) -> None:
+        """Store fields for key, evicting the least recently used entry if full."""
+        self._entries[key] = extracted
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
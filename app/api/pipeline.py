@@ -0,0 +1,213 @@
+"""
+Queue-based receipt pipeline shared by concurrent requests.
+
+load+preprocess -> OCR -> extract run as separate stages connected by
+asyncio queues, so while one receipt is in OCR the next ones are already
+being preprocessed, and receipts that arrive together are OCR'd in one
+batched PaddleOCR call. Throughput is then bounded by the slowest stage
+rather than by the sum of all stages.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.config import APIConfig
+from app.preprocessing.preprocessor import ReceiptPreprocessor, load_image_from_bytes
+from app.ocr.ocr_engine import ReceiptOCR, OCRBatch
+from app.parsing.extractors import ReceiptExtractor
+
+logger = logging.getLogger(__name__)
+
+
+class _Job:
+    """One receipt moving through the pipeline."""
+    
+    __slots__ = ("content", "with_text", "future", "image", "ocr_results")
+    
+    def __init__(self, content: bytes, with_text: bool, future: asyncio.Future):
+        self.content = content
+        self.with_text = with_text
+        self.future = future
+        self.image: Optional[np.ndarray] = None
+        self.ocr_results: Optional[OCRBatch] = None
+    
+    def fail(self, exc: BaseException) -> None:
+        """Report an error to the waiting request (unless it already gave up)."""
+        if not self.future.done():
+            self.future.set_exception(exc)
+    
+    def finish(self, result: Tuple[Optional[dict], Optional[str]]) -> None:
+        """Hand the result to the waiting request (unless it already gave up)."""
+        if not self.future.done():
+            self.future.set_result(result)
+
+
+class ReceiptPipeline:
+    """
+    Staged load/preprocess -> OCR -> extract pipeline.
+    
+    Call start() from a running event loop (the app lifespan), submit()
+    per request, and stop() on shutdown. Blocking work runs in thread
+    pools: one sized for preprocessing/extraction, and a single thread for
+    OCR since the PaddleOCR predictor is used by one call at a time.
+    """
+    
+    def __init__(
+        self,
+        preprocessor: ReceiptPreprocessor,
+        ocr_engine: ReceiptOCR,
+        extractor: ReceiptExtractor,
+        preprocess_workers: int = APIConfig.PREPROCESS_WORKERS,
+        ocr_batch_size: int = APIConfig.OCR_BATCH_SIZE,
+        ocr_batch_wait_ms: float = APIConfig.OCR_BATCH_WAIT_MS
+    ):
+        self.preprocessor = preprocessor
+        self.ocr_engine = ocr_engine
+        self.extractor = extractor
+        self.preprocess_workers = max(1, preprocess_workers)
+        self.ocr_batch_size = max(1, ocr_batch_size)
+        self.ocr_batch_wait = ocr_batch_wait_ms / 1000.0
+        
+        self._cpu_executor: Optional[ThreadPoolExecutor] = None
+        self._ocr_executor: Optional[ThreadPoolExecutor] = None
+        self._preprocess_q: Optional[asyncio.Queue] = None
+        self._ocr_q: Optional[asyncio.Queue] = None
+        self._extract_q: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Jobs submitted but not yet handed to the OCR stage
+        self._upstream = 0
+    
+    def start(self) -> None:
+        """Create the queues and stage workers on the running event loop."""
+        self._cpu_executor = ThreadPoolExecutor(
+            max_workers=self.preprocess_workers, thread_name_prefix="receipt-cpu"
+        )
+        self._ocr_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="receipt-ocr")
+        self._preprocess_q = asyncio.Queue()
+        self._ocr_q = asyncio.Queue()
+        self._extract_q = asyncio.Queue()
+        
+        self._tasks = [
+            asyncio.create_task(self._preprocess_worker())
+            for _ in range(self.preprocess_workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._ocr_worker()))
+        self._tasks.append(asyncio.create_task(self._extract_worker()))
+    
+    async def stop(self) -> None:
+        """Cancel the stage workers and release the thread pools."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        
+        if self._cpu_executor is not None:
+            self._cpu_executor.shutdown(wait=False, cancel_futures=True)
+        if self._ocr_executor is not None:
+            self._ocr_executor.shutdown(wait=False, cancel_futures=True)
+    
+    async def submit(self, content: bytes, with_text: bool = False) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Run one receipt through the pipeline.
+        
+        Args:
+            content: Raw uploaded image bytes
+            with_text: Also return the full OCR text (for debug responses)
+            
+        Returns:
+            Tuple of (extracted_fields, full_text); extracted_fields is None
+            when no text was detected, full_text is None unless with_text
+            
+        Raises:
+            ValueError: If the image cannot be decoded
+        """
+        job = _Job(content, with_text, asyncio.get_running_loop().create_future())
+        self._upstream += 1
+        await self._preprocess_q.put(job)
+        return await job.future
+    
+    def _load_and_preprocess(self, content: bytes) -> np.ndarray:
+        image = load_image_from_bytes(content, grayscale=True)
+        return self.preprocessor.process(image)
+    
+    def _extract(self, ocr_results: OCRBatch, with_text: bool) -> Tuple[Optional[dict], Optional[str]]:
+        if not ocr_results:
+            return None, None
+        
+        text_lines = self.ocr_engine.get_text_lines(ocr_results)
+        extracted = self.extractor.extract_all(ocr_results, text_lines)
+        
+        full_text = self.ocr_engine.get_full_text_from_lines(text_lines) if with_text else None
+        return extracted, full_text
+    
+    async def _preprocess_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._preprocess_q.get()
+            try:
+                if not job.future.done():
+                    job.image = await loop.run_in_executor(
+                        self._cpu_executor, self._load_and_preprocess, job.content
+                    )
+                    job.content = b""  # bytes no longer needed, let them be freed
+                    self._ocr_q.put_nowait(job)
+            except Exception as e:
+                job.fail(e)
+            finally:
+                self._upstream -= 1
+    
+    async def _ocr_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Flush when the batch is full, the wait window after the first
+            # image has passed, or no other receipt is on its way
+            jobs = [await self._ocr_q.get()]
+            deadline = loop.time() + self.ocr_batch_wait
+            while len(jobs) < self.ocr_batch_size:
+                if self._ocr_q.empty() and self._upstream == 0:
+                    break
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    jobs.append(await asyncio.wait_for(self._ocr_q.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            jobs = [job for job in jobs if not job.future.done()]
+            if not jobs:
+                continue
+            
+            try:
+                batches = await loop.run_in_executor(
+                    self._ocr_executor,
+                    self.ocr_engine.extract_text_batch,
+                    [job.image for job in jobs]
+                )
+            except Exception as e:
+                for job in jobs:
+                    job.fail(e)
+                continue
+            
+            for job, ocr_results in zip(jobs, batches):
+                job.image = None
+                job.ocr_results = ocr_results
+                await self._extract_q.put(job)
+    
+    async def _extract_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._extract_q.get()
+            if job.future.done():
+                continue
+            try:
+                result = await loop.run_in_executor(
+                    self._cpu_executor, self._extract, job.ocr_results, job.with_text
+                )
+            except Exception as e:
+                job.fail(e)
+                continue
+            job.finish(result)
@@ -2,69 +2,86 @@
 API Routes for Receipt OCR Pipeline.
 """
 import time
+import asyncio
 import logging
+from concurrent.futures import Executor
 from typing import Optional
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
 
+from app.config import APIConfig
+from app.api.cache import ExtractionCache
+from app.api.pipeline import ReceiptPipeline
 from app.api.schemas import (
     ExtractionResponse,
     ExtractionResponseWithDebug,
     ErrorResponse,
     HealthResponse
 )
-from app.preprocessing.preprocessor import ReceiptPreprocessor, load_image_from_bytes
-from app.ocr.ocr_engine import ReceiptOCR
-from app.parsing.extractors import ReceiptExtractor
+from app.ocr.worker import run_ocr
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize components (lazy-loaded)
-_preprocessor: Optional[ReceiptPreprocessor] = None
-_ocr_engine: Optional[ReceiptOCR] = None
-_extractor: Optional[ReceiptExtractor] = None
 
+# Components are created once in the application lifespan (see app.main)
+# and shared across requests through app.state.
+def get_pipeline(request: Request) -> Optional[ReceiptPipeline]:
+    """Get the in-process receipt pipeline, or None when a process pool is used."""
+    return request.app.state.pipeline
 
-def get_preprocessor() -> ReceiptPreprocessor:
-    """Get or create preprocessor instance."""
-    global _preprocessor
-    if _preprocessor is None:
-        _preprocessor = ReceiptPreprocessor()
-    return _preprocessor
 
+def get_process_pool(request: Request) -> Optional[Executor]:
+    """Get the OCR worker process pool, or None when OCR runs in-process."""
+    return request.app.state.process_pool
 
-def get_ocr_engine() -> ReceiptOCR:
-    """Get or create OCR engine instance."""
-    global _ocr_engine
-    if _ocr_engine is None:
-        _ocr_engine = ReceiptOCR(lang="en", use_gpu=False)
-    return _ocr_engine
 
+def get_result_cache(request: Request) -> ExtractionCache:
+    """Get the cache of recent extraction results, keyed by upload content."""
+    return request.app.state.result_cache
 
-def get_extractor() -> ReceiptExtractor:
-    """Get or create extractor instance."""
-    global _extractor
-    if _extractor is None:
-        _extractor = ReceiptExtractor()
-    return _extractor
+
+def _build_response(extracted: dict) -> ExtractionResponse:
+    """Build the standard (non-debug) response from extracted fields."""
+    return ExtractionResponse(
+        merchant_name=extracted["merchant_name"],
+        transaction_date=extracted["transaction_date"],
+        total_amount_raw=extracted["total_amount_raw"],
+        total_amount_value=extracted["total_amount_value"],
+        confidence_score=extracted["confidence_score"]
+    )
+
+
+def _file_too_large() -> HTTPException:
+    """Build the 413 error for uploads over APIConfig.MAX_UPLOAD_BYTES."""
+    return HTTPException(
+        status_code=413,
+        detail={
+            "error": "FileTooLarge",
+            "message": f"Uploaded file exceeds {APIConfig.MAX_UPLOAD_BYTES} bytes"
+        }
+    )
+
+
+# Health status never changes, so the body is serialized once at import
+_HEALTH_BODY = HealthResponse(
+    status="healthy",
+    version="1.0.0",
+    ocr_engine="paddleocr"
+).model_dump_json().encode()
 
 
 @router.get(
     "/health",
-    response_model=HealthResponse,
+    responses={200: {"model": HealthResponse, "description": "Service is healthy"}},
     summary="Health Check",
     description="Check if the API is running and healthy"
 )
 async def health_check():
     """Health check endpoint."""
-    return HealthResponse(
-        status="healthy",
-        version="1.0.0",
-        ocr_engine="paddleocr"
-    )
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 @router.post(
@@ -73,6 +90,7 @@ async def health_check():
     responses={
         200: {"model": ExtractionResponse, "description": "Successful extraction"},
         400: {"model": ErrorResponse, "description": "Invalid input"},
+        413: {"model": ErrorResponse, "description": "File too large"},
         500: {"model": ErrorResponse, "description": "Processing error"}
     },
     summary="Extract Receipt Data",
@@ -80,7 +98,10 @@ async def health_check():
 )
 async def extract_receipt(
     file: UploadFile = File(..., description="Receipt image file (JPEG, PNG, etc.)"),
-    debug: bool = Query(False, description="Include debug information in response")
+    debug: bool = Query(False, description="Include debug information in response"),
+    pipeline: Optional[ReceiptPipeline] = Depends(get_pipeline),
+    process_pool: Optional[Executor] = Depends(get_process_pool),
+    result_cache: ExtractionCache = Depends(get_result_cache)
 ):
     """
     Extract data from a receipt image.
@@ -100,9 +121,19 @@ async def extract_receipt(
             }
         )
     
+    # Reject early when the client declared an oversize body
+    if file.size is not None and file.size > APIConfig.MAX_UPLOAD_BYTES:
+        raise _file_too_large()
+    
     try:
-        # Read file content
-        content = await file.read()
+        # Stream the upload so an oversize body is rejected before it is
+        # fully buffered. The bytearray is passed on as is: converting it to
+        # bytes would copy the whole upload once more
+        content = bytearray()
+        while chunk := await file.read(APIConfig.UPLOAD_CHUNK_SIZE):
+            content += chunk
+            if len(content) > APIConfig.MAX_UPLOAD_BYTES:
+                raise _file_too_large()
         
         if not content:
             raise HTTPException(
@@ -115,18 +146,22 @@ async def extract_receipt(
         
         logger.info(f"Processing receipt: {file.filename}, size: {len(content)} bytes")
         
-        # Load image from bytes
-        image = load_image_from_bytes(content)
+        # Same image seen recently: reuse its result. Debug requests always
+        # run the pipeline so they can report OCR text and timing.
+        cache_key = result_cache.key_for(content)
+        if not debug:
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Returning cached extraction for {file.filename}")
+                return _build_response(cached)
         
-        # Preprocess image
-        preprocessor = get_preprocessor()
-        processed_image = preprocessor.process(image)
-        
-        # Run OCR
-        ocr_engine = get_ocr_engine()
-        ocr_results = ocr_engine.extract_text(processed_image)
+        if process_pool is not None:
+            loop = asyncio.get_running_loop()
+            extracted, full_text = await loop.run_in_executor(process_pool, run_ocr, content, debug)
+        else:
+            extracted, full_text = await pipeline.submit(content, with_text=debug)
         
-        if not ocr_results:
+        if extracted is None:
             return ExtractionResponse(
                 merchant_name=None,
                 transaction_date=None,
@@ -135,10 +170,7 @@ async def extract_receipt(
                 confidence_score=0.0
             )
         
-        # Extract fields
-        text_lines = ocr_engine.get_text_lines(ocr_results)
-        extractor = get_extractor()
-        extracted = extractor.extract_all(ocr_results, text_lines)
+        result_cache.put(cache_key, extracted)
         
         # Calculate processing time
         processing_time = (time.time() - start_time) * 1000  # Convert to ms
@@ -147,7 +179,6 @@ async def extract_receipt(
         
         # Build response
         if debug:
-            full_text = ocr_engine.get_full_text(ocr_results)
             return ExtractionResponseWithDebug(
                 merchant_name=extracted["merchant_name"],
                 transaction_date=extracted["transaction_date"],
@@ -159,13 +190,10 @@ async def extract_receipt(
                 processing_time_ms=round(processing_time, 2)
             )
         else:
-            return ExtractionResponse(
-                merchant_name=extracted["merchant_name"],
-                transaction_date=extracted["transaction_date"],
-                total_amount_raw=extracted["total_amount_raw"],
-                total_amount_value=extracted["total_amount_value"],
-                confidence_score=extracted["confidence_score"]
-            )
+            return _build_response(extracted)
+    
+    except HTTPException:
+        raise
     
     except ValueError as e:
         logger.error(f"Value error processing receipt: {e}")
@@ -5,13 +5,23 @@ Usage:
     uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
 """
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from app.api.routes import router as api_router
+from app.api.cache import ExtractionCache
+from app.api.pipeline import ReceiptPipeline
+from app.config import APIConfig
+from app.preprocessing.preprocessor import create_preprocessor
+from app.ocr.ocr_engine import ReceiptOCR
+from app.parsing.extractors import ReceiptExtractor
+from app.ocr.worker import init_worker
 
 # Configure logging
 logging.basicConfig(
@@ -28,20 +38,46 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Receipt OCR Pipeline API...")
     logger.info("API documentation available at /docs")
     
-    # Pre-load OCR model to avoid delay on first request
-    logger.info("Pre-loading PaddleOCR model (this may take 15-30 seconds)...")
-    try:
-        from app.api.routes import get_ocr_engine
-        ocr_engine = get_ocr_engine()
-        # Trigger model loading by accessing the internal OCR
-        ocr_engine._get_ocr()
-        logger.info("PaddleOCR model loaded successfully!")
-    except Exception as e:
-        logger.warning(f"Failed to pre-load OCR model: {e}. Will load on first request.")
+    # Create pipeline components once and share them via app.state
+    app.state.preprocessor = create_preprocessor()
+    app.state.ocr = ReceiptOCR(lang="en", use_gpu=False)
+    app.state.extractor = ReceiptExtractor()
+    # Results of recently processed uploads, keyed by content hash
+    app.state.result_cache = ExtractionCache(max_size=APIConfig.RESULT_CACHE_SIZE)
+    app.state.process_pool = None
+    app.state.pipeline = None
+    
+    if APIConfig.OCR_PROCESS_WORKERS > 0:
+        # Each worker process loads its own model in init_worker
+        logger.info(f"Starting {APIConfig.OCR_PROCESS_WORKERS} OCR worker processes...")
+        app.state.process_pool = ProcessPoolExecutor(
+            max_workers=APIConfig.OCR_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker
+        )
+    else:
+        # Pre-load OCR model to avoid delay on first request
+        logger.info("Pre-loading PaddleOCR model (this may take 15-30 seconds)...")
+        try:
+            # Trigger model loading by accessing the internal OCR
+            app.state.ocr._get_ocr()
+            logger.info("PaddleOCR model loaded successfully!")
+        except Exception as e:
+            logger.warning(f"Failed to pre-load OCR model: {e}. Will load on first request.")
+        
+        # Staged preprocess -> OCR -> extract pipeline shared by all requests
+        app.state.pipeline = ReceiptPipeline(
+            app.state.preprocessor, app.state.ocr, app.state.extractor
+        )
+        app.state.pipeline.start()
     
     yield
     
     # Shutdown
+    if app.state.pipeline is not None:
+        await app.state.pipeline.stop()
+    if app.state.process_pool is not None:
+        app.state.process_pool.shutdown(wait=False, cancel_futures=True)
     logger.info("Shutting down Receipt OCR Pipeline API...")
 
 
@@ -68,11 +104,16 @@ JPEG, PNG, TIFF, BMP, WebP
     """,
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json"
 )
 
+# Compress larger responses (e.g. debug OCR text). Added before CORS so
+# CORS ends up as the outer middleware and wraps the compressed body.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
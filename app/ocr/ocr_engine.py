@@ -9,16 +9,108 @@ os.environ['DISABLE_MODEL_SOURCE_CHECK'] = 'true'
 os.environ['MKLDNN_CACHE_CAPACITY'] = '0'
 os.environ['FLAGS_enable_pir_in_executor'] = '0'
 
+import threading
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Sequence, Union
 import logging
 
+from app.config import OCRConfig
+
 logger = logging.getLogger(__name__)
 
 
+def compute_box_geometry(bboxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute per-box geometry for a whole batch in one vectorized pass.
+    
+    Args:
+        bboxes: Array of shape (N, 4, 2) holding the 4 corner points of each box
+        
+    Returns:
+        Tuple of (center_x, center_y, left_x, right_x) arrays of shape (N,)
+    """
+    xs = bboxes[:, :, 0]
+    ys = bboxes[:, :, 1]
+    return xs.mean(axis=1), ys.mean(axis=1), xs.min(axis=1), xs.max(axis=1)
+
+
+def group_line_indices(
+    center_y: np.ndarray,
+    left_x: np.ndarray,
+    line_threshold: float
+) -> List[np.ndarray]:
+    """
+    Group boxes into lines by vertical position.
+    
+    A line starts at the first box not yet assigned and takes every following
+    box whose center is within line_threshold of it.
+    
+    Args:
+        center_y: Box vertical centers, sorted ascending
+        left_x: Box left edges, aligned with center_y
+        line_threshold: Maximum vertical distance to consider same line (pixels)
+        
+    Returns:
+        One index array per line, ordered left-to-right within the line
+    """
+    n = len(center_y)
+    lines: List[np.ndarray] = []
+    start = 0
+    while start < n:
+        # Since center_y is sorted, the line ends at the first box further
+        # than line_threshold below the line's first box
+        end = int(np.searchsorted(center_y, center_y[start] + line_threshold, side="right"))
+        end = max(end, start + 1)
+        
+        # Sort left-to-right (stable, like list.sort)
+        lines.append(np.argsort(left_x[start:end], kind="stable") + start)
+        start = end
+    
+    return lines
+
+
+def group_into_lines(
+    results: Union["OCRBatch", Sequence["OCRResult"]],
+    line_threshold: float = 20.0
+) -> List[List["OCRResult"]]:
+    """
+    Group OCR results into lines by vertical position; see group_line_indices.
+    
+    Args:
+        results: OCRBatch sorted by center_y (as extract_text returns it), or
+            OCRResult objects in any order
+        line_threshold: Maximum vertical distance to consider same line (pixels)
+        
+    Returns:
+        List of lines, top to bottom, each sorted left-to-right
+    """
+    if not results:
+        return []
+    
+    if isinstance(results, OCRBatch):
+        return [[results[i] for i in line.tolist()] for line in results.line_groups(line_threshold)]
+    
+    n = len(results)
+    center_y = np.fromiter((r.center_y for r in results), dtype=np.float64, count=n)
+    left_x = np.fromiter((r.left_x for r in results), dtype=np.float64, count=n)
+    # Stable, so results that are already sorted keep their order
+    order = np.argsort(center_y, kind="stable")
+    
+    return [
+        [results[i] for i in order[line].tolist()]
+        for line in group_line_indices(center_y[order], left_x[order], line_threshold)
+    ]
+
+
 class OCRResult:
     """Represents a single OCR detection result."""
     
+    # Hundreds are created per receipt; slots drop the per-instance __dict__
+    __slots__ = (
+        "text", "confidence", "_raw_bbox", "bbox", "line_index",
+        "center_x", "center_y", "left_x", "right_x",
+    )
+    
     def __init__(
         self,
         text: str,
@@ -31,8 +123,43 @@ class OCRResult:
         self._raw_bbox = bbox
         self.bbox = self._normalize_bbox(bbox)
         self.line_index = line_index
+        
+        # Geometry is fixed once the bbox is known, so compute it up front
+        # instead of on every access (it is read heavily while sorting/grouping)
+        xs = [point[0] for point in self.bbox]
+        ys = [point[1] for point in self.bbox]
+        self.center_x = sum(xs) / len(xs)
+        self.center_y = sum(ys) / len(ys)
+        self.left_x = min(xs)
+        self.right_x = max(xs)
     
-    def _normalize_bbox(self, bbox) -> List[List[float]]:
+    @classmethod
+    def _from_geometry(
+        cls,
+        text: str,
+        confidence: float,
+        bbox: List[List[float]],
+        center_x: float,
+        center_y: float,
+        left_x: float,
+        right_x: float,
+        line_index: int = 0
+    ) -> "OCRResult":
+        """Build a result from an already-normalized bbox and precomputed geometry."""
+        result = cls.__new__(cls)
+        result.text = text
+        result.confidence = confidence
+        result._raw_bbox = bbox
+        result.bbox = bbox
+        result.line_index = line_index
+        result.center_x = center_x
+        result.center_y = center_y
+        result.left_x = left_x
+        result.right_x = right_x
+        return result
+    
+    @staticmethod
+    def _normalize_bbox(bbox) -> List[List[float]]:
         """Normalize bbox to [[x1,y1], [x2,y2], [x3,y3], [x4,y4]] format."""
         try:
             # Handle numpy array
@@ -43,14 +170,14 @@ class OCRResult:
                 return [[0, 0], [0, 0], [0, 0], [0, 0]]
             
             # Check if already in correct format (list of points)
-            if isinstance(bbox, list) and len(bbox) >= 4:
+            if isinstance(bbox, (list, tuple)) and len(bbox) >= 4:
                 first = bbox[0]
                 if isinstance(first, (list, tuple)) and len(first) >= 2:
                     # Already in [[x,y], ...] format
                     return [[float(p[0]), float(p[1])] for p in bbox[:4]]
             
-            # Handle flat format [x1,y1,x2,y2,x3,y3,x4,y4]
-            if isinstance(bbox, list) and len(bbox) >= 8:
+            # Handle flat format [x1,y1,x2,y2,x3,y3,x4,y4] (list or tuple)
+            if isinstance(bbox, (list, tuple)) and len(bbox) >= 8:
                 return [
                     [float(bbox[0]), float(bbox[1])],
                     [float(bbox[2]), float(bbox[3])],
@@ -59,7 +186,7 @@ class OCRResult:
                 ]
             
             # Handle 4-element box [x_min, y_min, x_max, y_max]
-            if isinstance(bbox, list) and len(bbox) == 4:
+            if isinstance(bbox, (list, tuple)) and len(bbox) == 4:
                 x1, y1, x2, y2 = [float(v) for v in bbox]
                 return [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
             
@@ -70,37 +197,14 @@ class OCRResult:
             logger.error(f"Error normalizing bbox: {e}")
             return [[0, 0], [0, 0], [0, 0], [0, 0]]
     
-    @property
-    def center_y(self) -> float:
-        """Get the vertical center of the bounding box."""
-        try:
-            return sum(point[1] for point in self.bbox) / len(self.bbox)
-        except (IndexError, TypeError, ZeroDivisionError):
-            return 0.0
-    
-    @property
-    def center_x(self) -> float:
-        """Get the horizontal center of the bounding box."""
-        try:
-            return sum(point[0] for point in self.bbox) / len(self.bbox)
-        except (IndexError, TypeError, ZeroDivisionError):
-            return 0.0
-    
-    @property
-    def left_x(self) -> float:
-        """Get the leftmost x coordinate."""
-        try:
-            return min(point[0] for point in self.bbox)
-        except (IndexError, TypeError, ValueError):
-            return 0.0
-    
-    @property
-    def right_x(self) -> float:
-        """Get the rightmost x coordinate."""
-        try:
-            return max(point[0] for point in self.bbox)
-        except (IndexError, TypeError, ValueError):
-            return 0.0
+    def to_dict(self) -> dict:
+        """Plain-Python representation; OCRResult(**d) rebuilds the result."""
+        return {
+            "text": self.text,
+            "confidence": float(self.confidence),
+            "bbox": self.bbox,
+            "line_index": self.line_index
+        }
     
     def __repr__(self) -> str:
         try:
@@ -109,6 +213,116 @@ class OCRResult:
             return f"OCRResult(text='{self.text}', confidence={self.confidence:.2f})"
 
 
+class OCRBatch:
+    """
+    OCR detections for one image in column (structure-of-arrays) layout.
+    
+    Texts are kept in a list; confidences, boxes and box geometry live in
+    NumPy arrays so sorting and line grouping run as array operations.
+    Indexing and iteration yield OCRResult rows (built once, on first use),
+    so code written against a list of OCRResult keeps working.
+    """
+    
+    def __init__(
+        self,
+        texts: Sequence[str],
+        confidences: Sequence[float],
+        bboxes
+    ):
+        """
+        Args:
+            texts: Recognized text per detection
+            confidences: Recognition score per detection
+            bboxes: Box corners per detection, anything reshapeable to (N, 4, 2)
+        """
+        self.texts: List[str] = list(texts)
+        self.confidences = np.asarray(confidences, dtype=np.float64)
+        self.bboxes = np.asarray(bboxes, dtype=np.float32).reshape(-1, 4, 2)
+        self.center_x, self.center_y, self.left_x, self.right_x = compute_box_geometry(self.bboxes)
+        self.line_index = np.arange(len(self.texts), dtype=np.int32)
+        self._rows: Optional[List[OCRResult]] = None
+        self._full_text: Optional[Tuple[float, str]] = None
+    
+    @classmethod
+    def from_results(cls, results: Sequence[OCRResult]) -> "OCRBatch":
+        """
+        Pack OCRResult objects into columns, keeping their order and line_index.
+        
+        Lets code holding a list of results (tests, callers building results
+        by hand) use the array paths of OCRBatch.
+        """
+        batch = cls(
+            [r.text for r in results],
+            [r.confidence for r in results],
+            [r.bbox for r in results]
+        )
+        batch.line_index = np.fromiter(
+            (r.line_index for r in results), dtype=np.int32, count=len(results)
+        )
+        return batch
+    
+    def reorder(self, order: np.ndarray) -> None:
+        """Permute every column by the given index order."""
+        self.texts = [self.texts[i] for i in order.tolist()]
+        self.confidences = self.confidences[order]
+        self.bboxes = self.bboxes[order]
+        self.center_x = self.center_x[order]
+        self.center_y = self.center_y[order]
+        self.left_x = self.left_x[order]
+        self.right_x = self.right_x[order]
+        self.line_index = self.line_index[order]
+        self._rows = None
+        self._full_text = None
+    
+    def line_groups(self, line_threshold: float = 20.0) -> List[np.ndarray]:
+        """Group detections into lines; see group_line_indices."""
+        return group_line_indices(self.center_y, self.left_x, line_threshold)
+    
+    def full_text(self, line_threshold: float = 20.0) -> str:
+        """Text joined with spaces within a line and newlines between lines (cached)."""
+        if self._full_text is None or self._full_text[0] != line_threshold:
+            texts = self.texts
+            joined = "\n".join(
+                " ".join(texts[i] for i in line.tolist())
+                for line in self.line_groups(line_threshold)
+            )
+            self._full_text = (line_threshold, joined)
+        return self._full_text[1]
+    
+    @property
+    def rows(self) -> List[OCRResult]:
+        """Row view of the batch as OCRResult objects."""
+        if self._rows is None:
+            bboxes = self.bboxes.tolist()
+            confidences = self.confidences.tolist()
+            center_x, center_y = self.center_x.tolist(), self.center_y.tolist()
+            left_x, right_x = self.left_x.tolist(), self.right_x.tolist()
+            line_index = self.line_index.tolist()
+            self._rows = [
+                OCRResult._from_geometry(
+                    text=self.texts[i],
+                    confidence=confidences[i],
+                    bbox=bboxes[i],
+                    center_x=center_x[i],
+                    center_y=center_y[i],
+                    left_x=left_x[i],
+                    right_x=right_x[i],
+                    line_index=line_index[i]
+                )
+                for i in range(len(self.texts))
+            ]
+        return self._rows
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    def __getitem__(self, index):
+        return self.rows[index]
+    
+    def __iter__(self):
+        return iter(self.rows)
+
+
 class ReceiptOCR:
     """
     OCR engine for receipt text extraction using PaddleOCR.
@@ -123,7 +337,9 @@ class ReceiptOCR:
         self,
         lang: str = "en",
         use_gpu: bool = False,
-        use_angle_cls: bool = True
+        use_angle_cls: bool = True,
+        det_model: Optional[str] = OCRConfig.DET_MODEL,
+        rec_model: Optional[str] = OCRConfig.REC_MODEL
     ):
         """
         Initialize PaddleOCR engine.
@@ -132,30 +348,83 @@ class ReceiptOCR:
             lang: Language code ("en" for English, "ch" for Chinese)
             use_gpu: Whether to use GPU acceleration
             use_angle_cls: Whether to use angle classification
+            det_model: PaddleOCR text detection model name (None for default)
+            rec_model: PaddleOCR text recognition model name (None for default)
         """
         self.lang = lang
         self.use_gpu = use_gpu
         self.use_angle_cls = use_angle_cls
+        self.det_model = det_model
+        self.rec_model = rec_model
         self._ocr = None
+        self._init_lock = threading.Lock()
+        # PaddleOCR predictors are not thread-safe; serialize inference calls
+        self._predict_lock = threading.Lock()
     
     def _get_ocr(self):
         """Lazy initialization of PaddleOCR to avoid slow import on startup."""
         if self._ocr is None:
-            try:
-                from paddleocr import PaddleOCR
-                
-                logger.info("Initializing PaddleOCR engine...")
-                self._ocr = PaddleOCR(
-                    lang=self.lang,
-                )
-                logger.info("PaddleOCR initialized successfully")
-            except ImportError:
-                logger.error("PaddleOCR not installed. Install with: pip install paddleocr paddlepaddle")
-                raise ImportError("PaddleOCR is required. Install with: pip install paddleocr paddlepaddle")
+            # Guard so concurrent first calls don't build two PaddleOCR instances
+            with self._init_lock:
+                if self._ocr is None:
+                    try:
+                        from paddleocr import PaddleOCR
+                        
+                        logger.info(
+                            f"Initializing PaddleOCR engine "
+                            f"(det={self.det_model or 'default'}, rec={self.rec_model or 'default'})..."
+                        )
+                        model_kwargs = {}
+                        if self.det_model:
+                            model_kwargs["text_detection_model_name"] = self.det_model
+                        if self.rec_model:
+                            model_kwargs["text_recognition_model_name"] = self.rec_model
+                        self._ocr = PaddleOCR(
+                            lang=self.lang,
+                            **model_kwargs
+                        )
+                        logger.info("PaddleOCR initialized successfully")
+                    except ImportError:
+                        logger.error("PaddleOCR not installed. Install with: pip install paddleocr paddlepaddle")
+                        raise ImportError("PaddleOCR is required. Install with: pip install paddleocr paddlepaddle")
         
         return self._ocr
     
-    def extract_text(self, image: np.ndarray) -> List[OCRResult]:
+    @staticmethod
+    def _stack_boxes(boxes, count: int) -> Optional[np.ndarray]:
+        """
+        Cast batched polygons to a (count, 4, 2) float32 array in one call.
+        
+        Returns None when the boxes are not uniform 4-point ndarrays, in which
+        case callers fall back to OCRResult._normalize_bbox per box.
+        """
+        if not isinstance(boxes, np.ndarray):
+            if not (isinstance(boxes, (list, tuple)) and boxes and isinstance(boxes[0], np.ndarray)):
+                return None
+        
+        try:
+            stacked = np.asarray(boxes, dtype=np.float32)
+        except ValueError:
+            return None
+        
+        if stacked.ndim != 3 or stacked.shape[1:] != (4, 2) or len(stacked) < count:
+            return None
+        
+        return stacked[:count]
+    
+    @staticmethod
+    def _as_three_channel(image: np.ndarray) -> np.ndarray:
+        """
+        Present a grayscale image as 3-channel without copying.
+        
+        The preprocessor emits single-channel images; PaddleOCR expects HxWx3,
+        so the gray plane is broadcast (read-only view) instead of converted.
+        """
+        if image.ndim == 2:
+            return np.broadcast_to(image[..., None], (*image.shape, 3))
+        return image
+    
+    def extract_text(self, image: np.ndarray) -> OCRBatch:
         """
         Extract text from image with position information.
         
@@ -163,46 +432,95 @@ class ReceiptOCR:
             image: Preprocessed image as numpy array
             
         Returns:
-            List of OCRResult objects sorted by vertical position
+            OCRBatch of detections sorted by vertical position
         """
         ocr = self._get_ocr()
         
         logger.info("Running OCR on image (no args)...")
         # Explicitly call without arguments as cls arg causes error
-        result = ocr.ocr(image)
+        with self._predict_lock:
+            result = ocr.ocr(self._as_three_channel(image))
+        
+        return self._parse_result(result)
+    
+    def extract_text_batch(self, images: Sequence[np.ndarray]) -> List[OCRBatch]:
+        """
+        Extract text from several images with one PaddleOCR call.
+        
+        PaddleOCR 3.x accepts a list of images and returns one result per
+        image, which lets the predictors batch work across receipts. If the
+        installed version does not, images are processed one by one.
+        
+        Args:
+            images: Preprocessed images
+            
+        Returns:
+            One OCRBatch per image, in input order
+        """
+        if len(images) <= 1:
+            return [self.extract_text(image) for image in images]
         
+        ocr = self._get_ocr()
+        
+        logger.info(f"Running OCR on {len(images)} images...")
+        with self._predict_lock:
+            result = ocr.ocr([self._as_three_channel(image) for image in images])
+        
+        if result is None or len(result) != len(images):
+            logger.warning("Batched OCR returned unexpected output, falling back to per-image calls")
+            return [self.extract_text(image) for image in images]
+        
+        return [self._parse_result([page]) for page in result]
+    
+    def _parse_result(self, result) -> OCRBatch:
+        """Parse PaddleOCR output for a single image into a sorted OCRBatch."""
         if result is None or len(result) == 0 or result[0] is None:
             logger.warning("No text detected in image")
-            return []
+            return OCRBatch([], [], [])
         
-        # Parse PaddleOCR results
-        ocr_results = []
+        # Parse PaddleOCR results into the columns of an OCRBatch
+        texts_out: List[str] = []
+        confidences: Union[List[float], np.ndarray] = []
+        bboxes: Union[List[List[List[float]]], np.ndarray] = []
         
         # Handle PaddleOCR v2.9+ / PaddleX result format
         # The result[0] can be a dict-like OCRResult object
         if len(result) > 0 and hasattr(result[0], 'keys'):
             data = result[0]
             # PaddleX uses plural key names: rec_texts, rec_scores, rec_polys
-            boxes = data.get('rec_polys', data.get('dt_polys', []))
-            texts = data.get('rec_texts', data.get('rec_text', []))
-            scores = data.get('rec_scores', data.get('rec_score', []))
+            if 'rec_texts' in data and 'rec_scores' in data and 'rec_polys' in data:
+                texts, scores, boxes = data['rec_texts'], data['rec_scores'], data['rec_polys']
+            else:
+                boxes = data.get('rec_polys', data.get('dt_polys', []))
+                texts = data.get('rec_texts', data.get('rec_text', []))
+                scores = data.get('rec_scores', data.get('rec_score', []))
             
             logger.info(f"PaddleX format: {len(texts)} texts, {len(scores)} scores, {len(boxes)} boxes")
             
-            for i in range(len(texts)):
-                text = texts[i] if i < len(texts) else ""
-                score = scores[i] if i < len(scores) else 0.0
-                box = boxes[i] if i < len(boxes) else [[0,0],[0,0],[0,0],[0,0]]
-                
-                # Ensure box is list of points
-                if isinstance(box, np.ndarray):
-                    box = box.tolist()
+            # Polygons usually arrive as one (N, 4, 2) array or a list of
+            # (4, 2) arrays; cast them in one call instead of box by box
+            stacked_boxes = self._stack_boxes(boxes, len(texts))
+            
+            if stacked_boxes is not None and len(scores) == len(texts):
+                # Common case: one score and one box per text, so the
+                # columns can be taken over whole without per-item checks
+                texts_out = [str(text).strip() for text in texts]
+                confidences = np.asarray(scores, dtype=np.float64)
+                bboxes = stacked_boxes
+            else:
+                for i in range(len(texts)):
+                    text = texts[i] if i < len(texts) else ""
+                    score = scores[i] if i < len(scores) else 0.0
+                    
+                    texts_out.append(str(text).strip())
+                    confidences.append(float(score))
+                    
+                    if stacked_boxes is None:
+                        box = boxes[i] if i < len(boxes) else [[0,0],[0,0],[0,0],[0,0]]
+                        bboxes.append(OCRResult._normalize_bbox(box))
                 
-                ocr_results.append(OCRResult(
-                    text=str(text).strip(),
-                    confidence=float(score),
-                    bbox=box
-                ))
+                if stacked_boxes is not None:
+                    bboxes = stacked_boxes
                 
         # Handle standard list-of-lists format
         elif len(result) > 0 and isinstance(result[0], list):
@@ -232,79 +550,62 @@ class ReceiptOCR:
                         text = str(text_info)
                         confidence = 0.0
                 
-                    ocr_results.append(OCRResult(
-                        text=text.strip(),
-                        confidence=confidence,
-                        bbox=bbox
-                    ))
+                    texts_out.append(text.strip())
+                    confidences.append(confidence)
+                    bboxes.append(OCRResult._normalize_bbox(bbox))
                 except Exception as e:
                     logger.error(f"Error parsing line: {line}. Error: {e}")
                     continue
         
-        # Sort by vertical position (top to bottom)
-        ocr_results.sort(key=lambda r: r.center_y)
+        batch = OCRBatch(texts_out, confidences, bboxes)
+        
+        # Sort by vertical position (top to bottom); stable like list.sort
+        batch.reorder(np.argsort(batch.center_y, kind="stable"))
         
         # Assign line indices
-        for i, result in enumerate(ocr_results):
-            result.line_index = i
+        batch.line_index = np.arange(len(batch), dtype=np.int32)
         
-        logger.info(f"Extracted {len(ocr_results)} text regions")
-        return ocr_results
+        logger.info(f"Extracted {len(batch)} text regions")
+        return batch
     
-    def get_text_lines(self, results: List[OCRResult], line_threshold: float = 20.0) -> List[List[OCRResult]]:
+    def get_text_lines(self, results: Union["OCRBatch", List[OCRResult]], line_threshold: float = 20.0) -> List[List[OCRResult]]:
         """
         Group OCR results into logical lines based on vertical position.
         
+        A line starts at the first result not yet assigned and takes every
+        following result whose center is within line_threshold of it.
+        
         Args:
-            results: List of OCRResult objects
+            results: OCRBatch from extract_text, or a list of OCRResult objects
             line_threshold: Maximum vertical distance to consider same line (pixels)
             
         Returns:
             List of lines, where each line is a list of OCRResults sorted left-to-right
         """
-        if not results:
-            return []
-        
-        lines: List[List[OCRResult]] = []
-        current_line: List[OCRResult] = [results[0]]
-        current_y = results[0].center_y
-        
-        for result in results[1:]:
-            if abs(result.center_y - current_y) <= line_threshold:
-                # Same line
-                current_line.append(result)
-            else:
-                # New line - save current and start new
-                current_line.sort(key=lambda r: r.left_x)  # Sort left-to-right
-                lines.append(current_line)
-                current_line = [result]
-                current_y = result.center_y
-        
-        # Don't forget the last line
-        if current_line:
-            current_line.sort(key=lambda r: r.left_x)
-            lines.append(current_line)
-        
-        return lines
+        return group_into_lines(results, line_threshold)
     
-    def get_full_text(self, results: List[OCRResult]) -> str:
+    def get_full_text(self, results: Union[OCRBatch, List[OCRResult]]) -> str:
         """
         Get all extracted text as a single string with line breaks.
         
         Args:
-            results: List of OCRResult objects
+            results: OCRBatch from extract_text, or a list of OCRResult objects
             
         Returns:
             Full text with lines separated by newlines
         """
-        lines = self.get_text_lines(results)
-        text_lines = []
+        if isinstance(results, OCRBatch):
+            return results.full_text()
         
-        for line in lines:
-            line_text = " ".join(r.text for r in line)
-            text_lines.append(line_text)
+        return self.get_full_text_from_lines(self.get_text_lines(results))
+    
+    def get_full_text_from_lines(self, text_lines: List[List[OCRResult]]) -> str:
+        """
+        Join already-grouped lines (from get_text_lines) into a single string.
         
-        return "\n".join(text_lines)
+        Use this when the lines are at hand anyway, to avoid grouping twice.
+        """
+        return "\n".join(" ".join(r.text for r in line) for line in text_lines)
     
     def get_average_confidence(self, results: List[OCRResult]) -> float:
         """Calculate average confidence score across all results."""
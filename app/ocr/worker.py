@@ -0,0 +1,64 @@
+"""
+Process-pool worker for the receipt pipeline.
+
+Each worker process builds its own preprocessor, PaddleOCR engine and
+extractor once (via init_worker) and then runs whole receipts, so several
+receipts can be OCR'd in true parallel without sharing a predictor.
+"""
+import logging
+from typing import Optional, Tuple
+
+from app.preprocessing.preprocessor import ReceiptPreprocessor, create_preprocessor, load_image_from_bytes
+from app.ocr.ocr_engine import ReceiptOCR
+from app.parsing.extractors import ReceiptExtractor
+
+logger = logging.getLogger(__name__)
+
+# Per-process pipeline components, created by init_worker()
+_preprocessor: Optional[ReceiptPreprocessor] = None
+_ocr: Optional[ReceiptOCR] = None
+_extractor: Optional[ReceiptExtractor] = None
+
+
+def init_worker() -> None:
+    """Process-pool initializer: build pipeline components and load the model."""
+    global _preprocessor, _ocr, _extractor
+    
+    _preprocessor = create_preprocessor()
+    _ocr = ReceiptOCR(lang="en", use_gpu=False)
+    _extractor = ReceiptExtractor()
+    
+    try:
+        _ocr._get_ocr()
+    except Exception as e:
+        logger.warning(f"Failed to pre-load OCR model in worker: {e}. Will load on first request.")
+
+
+def run_ocr(image_bytes: bytes, with_text: bool = False) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    Run load -> preprocess -> OCR -> extract for one receipt in this worker.
+    
+    Args:
+        image_bytes: Raw uploaded image bytes
+        with_text: Also return the full OCR text (for debug responses)
+        
+    Returns:
+        Tuple of (extracted_fields, full_text). extracted_fields is None
+        when no text was detected; full_text is None unless with_text is set.
+        Only these plain values cross the process boundary.
+    """
+    if _ocr is None:
+        init_worker()
+    
+    image = load_image_from_bytes(image_bytes, grayscale=True)
+    processed_image = _preprocessor.process(image)
+    ocr_results = _ocr.extract_text(processed_image)
+    
+    if not ocr_results:
+        return None, None
+    
+    text_lines = _ocr.get_text_lines(ocr_results)
+    extracted = _extractor.extract_all(ocr_results, text_lines)
+    
+    full_text = _ocr.get_full_text_from_lines(text_lines) if with_text else None
+    return extracted, full_text
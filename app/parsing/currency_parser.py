@@ -4,7 +4,8 @@ Handles Indonesian Rupiah and other currency format parsing.
 Converts formatted currency strings to numeric values.
 """
 import re
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,20 +24,26 @@ class CurrencyParser:
     - 50,000
     """
     
-    # Currency symbol patterns to remove
-    CURRENCY_PREFIXES = [
-        r"[Rr][Pp]\.?\s*",  # Rp, Rp., rp
-        r"[Ii][Dd][Rr]\s*",  # IDR, idr
-        r"\$\s*",            # USD
-        r"[Uu][Ss][Dd]\s*",  # USD
-    ]
+    # Leading currency symbol to remove (Rp, Rp., IDR, $, USD), compiled
+    # once. Anchored so only a prefix is stripped; _parse_uncached then
+    # finds the number between the first and last digit (find/rfind on the
+    # _DIGIT_MASK translation) and rejects stray text inside it with the
+    # _NUMBER_CHARS check, so other text around the number is skipped.
+    _PREFIX_RE = re.compile(r"^\s*(?:[Rr][Pp]\.?|[Ii][Dd][Rr]|[Uu][Ss][Dd]|\$)\s*")
     
-    # Pattern to match number with various separators
-    NUMBER_PATTERN = re.compile(
-        r"^[^\d]*"  # Skip non-digits at start
-        r"([\d.,\s]+)"  # Capture digits with separators
-        r"[^\d]*$"  # Skip non-digits at end
-    )
+    # Translation tables for locating the number without the regex engine:
+    # digits -> "0" (so find/rfind give the first/last digit), and deleting
+    # everything a number may contain (so leftovers reveal stray text)
+    _DIGIT_MASK = str.maketrans("123456789", "000000000")
+    _NUMBER_CHARS = str.maketrans("", "", "0123456789.,")
+    # Deleting translate tables take CPython's slow per-character path;
+    # for a yes/no digit test a compiled character class is ~5x faster
+    _DIGIT_RE = re.compile(r"[0-9]")
+    
+    @staticmethod
+    def has_digit(text: str) -> bool:
+        """Cheap pre-check: only strings containing a digit can parse as an amount."""
+        return CurrencyParser._DIGIT_RE.search(text) is not None
     
     @classmethod
     def parse(cls, currency_string: str) -> Tuple[Optional[float], str]:
@@ -53,25 +60,41 @@ class CurrencyParser:
         if not currency_string or not isinstance(currency_string, str):
             return None, str(currency_string) if currency_string else ""
         
+        # The same tokens recur across lines and extraction strategies
+        return _parse_cached(currency_string)
+    
+    @classmethod
+    def _parse_uncached(cls, currency_string: str) -> Tuple[Optional[float], str]:
+        """Body of parse() for a non-empty string; see _parse_cached."""
         original = currency_string.strip()
-        cleaned = original
         
-        # Remove currency prefixes
-        for prefix_pattern in cls.CURRENCY_PREFIXES:
-            cleaned = re.sub(prefix_pattern, "", cleaned, flags=re.IGNORECASE)
-        
-        cleaned = cleaned.strip()
+        # Remove currency prefix (anchored match + slice, no substitution)
+        prefix = cls._PREFIX_RE.match(original)
+        cleaned = original[prefix.end():].strip() if prefix else original
         
         if not cleaned:
             return None, original
         
-        # Try to extract the numeric portion
-        match = cls.NUMBER_PATTERN.match(cleaned)
-        if not match:
+        # Numeric portion: first digit through last digit, plus any
+        # separators right after it; text on either side is skipped
+        masked = cleaned.translate(cls._DIGIT_MASK)
+        first = masked.find("0")
+        if first < 0:
+            logger.debug(f"No numeric pattern found in: {cleaned}")
+            return None, original
+        last = masked.rfind("0") + 1
+        
+        # Only digits, separators and whitespace may sit between them
+        stray = cleaned[first:last].translate(cls._NUMBER_CHARS)
+        if stray and not stray.isspace():
             logger.debug(f"No numeric pattern found in: {cleaned}")
             return None, original
         
-        number_str = match.group(1).strip()
+        end = last
+        while end < len(cleaned) and (cleaned[end] in ".," or cleaned[end].isspace()):
+            end += 1
+        
+        number_str = cleaned[first:end].strip()
         
         # Determine the format based on separator patterns
         value = cls._parse_number_string(number_str)
@@ -90,87 +113,43 @@ class CurrencyParser:
         Indonesian format: . for thousands, , for decimals (50.000,00 = 50000.00)
         International format: , for thousands, . for decimals (50,000.00 = 50000.00)
         """
+        # Plain digit run (e.g. "50000"): nothing to strip or classify
+        if number_str.isascii() and number_str.isdigit():
+            return float(number_str)
+        
         # Remove any whitespace within the number
-        number_str = re.sub(r"\s+", "", number_str)
+        number_str = "".join(number_str.split())
         
         if not number_str:
             return None
         
-        # Count separators
-        dots = number_str.count(".")
-        commas = number_str.count(",")
+        # The last separator is the candidate decimal separator
+        last_dot = number_str.rfind(".")
+        last_comma = number_str.rfind(",")
         
         try:
-            if dots == 0 and commas == 0:
+            if last_dot < 0 and last_comma < 0:
                 # Plain number: 50000
                 return float(number_str)
             
-            elif dots == 0 and commas == 1:
-                # Could be decimal (50,00) or thousands (50,000)
-                # Check position of comma
-                parts = number_str.split(",")
-                if len(parts[1]) == 2:
-                    # Likely decimal: 50,00 -> 50.00
-                    return float(number_str.replace(",", "."))
-                elif len(parts[1]) == 3:
-                    # Likely thousands: 50,000 -> 50000
-                    return float(number_str.replace(",", ""))
-                else:
-                    # Ambiguous, treat as decimal
-                    return float(number_str.replace(",", "."))
-            
-            elif dots == 1 and commas == 0:
-                # Could be decimal (50.00) or thousands (50.000)
-                parts = number_str.split(".")
-                if len(parts[1]) == 2:
-                    # Likely decimal: 50.00
-                    return float(number_str)
-                elif len(parts[1]) == 3:
-                    # Likely thousands (Indonesian): 50.000 -> 50000
-                    return float(number_str.replace(".", ""))
-                else:
-                    # Treat as decimal
-                    return float(number_str)
-            
-            elif dots >= 1 and commas >= 1:
-                # Mixed separators: check which one comes last to determine decimal separator
-                last_dot = number_str.rfind(".")
-                last_comma = number_str.rfind(",")
-                
-                if last_comma > last_dot:
-                    # Indonesian format: 50.000,00 (comma is decimal)
-                    normalized = number_str.replace(".", "").replace(",", ".")
-                    return float(normalized)
-                else:
-                    # International format: 50,000.00 (dot is decimal)
-                    normalized = number_str.replace(",", "")
-                    return float(normalized)
+            if last_dot > last_comma:
+                decimal_sep, other_sep, last_sep = ".", ",", last_dot
+            else:
+                decimal_sep, other_sep, last_sep = ",", ".", last_comma
             
-            elif dots > 1 and commas == 0:
-                # Multiple dots, treat as thousands separators (Indonesian): 1.234.567
-                normalized = number_str.replace(".", "")
+            if other_sep in number_str:
+                # Mixed separators, the last one is decimal:
+                # 50.000,00 (Indonesian) or 50,000.00 (International)
+                normalized = number_str.replace(other_sep, "").replace(decimal_sep, ".")
                 return float(normalized)
             
-            elif dots == 0 and commas > 1:
-                # Multiple commas, treat as thousands separators (International): 1,234,567
-                normalized = number_str.replace(",", "")
-                return float(normalized)
+            # Only one kind of separator. Repeated (1.234.567) or followed by
+            # exactly 3 digits (50.000, 50,000) means thousands; otherwise
+            # decimal (50,00, 50.5)
+            if number_str.count(decimal_sep) > 1 or len(number_str) - last_sep - 1 == 3:
+                return float(number_str.replace(decimal_sep, ""))
             
-            else:
-                # Complex case, try best effort
-                logger.warning(f"Ambiguous number format: {number_str}")
-                # Assume last separator is decimal
-                last_dot = number_str.rfind(".")
-                last_comma = number_str.rfind(",")
-                
-                if last_comma > last_dot:
-                    # Indonesian: comma is decimal
-                    normalized = number_str.replace(".", "").replace(",", ".")
-                else:
-                    # International: dot is decimal
-                    normalized = number_str.replace(",", "")
-                
-                return float(normalized)
+            return float(number_str.replace(decimal_sep, "."))
                 
         except ValueError as e:
             logger.debug(f"Failed to parse number '{number_str}': {e}")
@@ -201,34 +180,47 @@ class CurrencyParser:
         return min_value <= value <= max_value
 
 
-def extract_all_amounts(text: str) -> list:
+@lru_cache(maxsize=4096)
+def _parse_cached(currency_string: str) -> Tuple[Optional[float], str]:
+    """Memoized CurrencyParser parsing; results are immutable tuples."""
+    return CurrencyParser._parse_uncached(currency_string)
+
+
+# Currency-like strings: Rp 50.000, 50,000, 50.000,00, etc.
+_AMOUNT_SCAN_RE = re.compile(
+    r"(?:[Rr][Pp]\.?\s*|[Ii][Dd][Rr]\s*)?"  # Optional currency prefix
+    r"(\d{1,3}(?:[.,]\d{3})*(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?)",  # Number with separators
+    re.IGNORECASE
+)
+
+
+def iter_all_amounts(text: str) -> Iterator[Tuple[str, float, int]]:
     """
-    Extract all potential monetary amounts from a text string.
+    Lazily yield potential monetary amounts from a text string.
     
     Args:
         text: Raw text to scan for amounts
         
-    Returns:
-        List of tuples: (raw_string, parsed_value, start_position)
+    Yields:
+        Tuples of (raw_string, parsed_value, start_position)
     """
-    # Pattern to find currency-like strings
-    # Matches: Rp 50.000, 50,000, 50.000,00, etc.
-    pattern = re.compile(
-        r"(?:[Rr][Pp]\.?\s*|[Ii][Dd][Rr]\s*)?"  # Optional currency prefix
-        r"(\d{1,3}(?:[.,]\d{3})*(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?)",  # Number with separators
-        re.IGNORECASE
-    )
-    
-    results = []
-    parser = CurrencyParser()
-    
-    for match in pattern.finditer(text):
+    for match in _AMOUNT_SCAN_RE.finditer(text):
         raw_string = match.group(0)
-        start_pos = match.start()
         
-        parsed_value, _ = parser.parse(raw_string)
+        parsed_value, _ = CurrencyParser.parse(raw_string)
         
         if parsed_value is not None and parsed_value > 0:
-            results.append((raw_string, parsed_value, start_pos))
+            yield raw_string, parsed_value, match.start()
+
+
+def extract_all_amounts(text: str) -> list:
+    """
+    Extract all potential monetary amounts from a text string.
     
-    return results
+    Args:
+        text: Raw text to scan for amounts
+        
+    Returns:
+        List of tuples: (raw_string, parsed_value, start_position)
+    """
+    return list(iter_all_amounts(text))
@@ -3,16 +3,51 @@ Field Extractors for Receipt Data.
 Extracts merchant name, date, and total amount from OCR results.
 """
 import re
-from typing import List, Optional, Tuple
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, date
 import logging
 
 from app.config import ExtractionConfig
-from app.ocr.ocr_engine import OCRResult
+from app.ocr.ocr_engine import OCRResult, OCRBatch, group_into_lines
 from app.parsing.currency_parser import CurrencyParser, extract_all_amounts
 
 logger = logging.getLogger(__name__)
 
+# All DATE_PATTERNS as one alternation (group d<i> wraps pattern i), so the
+# text is scanned once instead of once per pattern
+_DATE_UNION = re.compile(
+    "|".join(f"(?P<d{i}>{p})" for i, p in enumerate(ExtractionConfig.DATE_PATTERNS)),
+    re.IGNORECASE
+)
+
+# Per pattern, in priority order, what is needed to read its match, worked
+# out once here instead of on every match:
+# (group name, slice of its own groups in match.groups(), uses month names,
+# year comes first)
+_DATE_ALTERNATIVES = tuple(
+    (
+        f"d{i}",
+        slice(_DATE_UNION.groupindex[f"d{i}"], _DATE_UNION.groupindex[f"d{i}"] + regex.groups),
+        any(month in regex.pattern.lower() for month in ["jan", "feb", "mar"]),
+        regex.pattern.startswith(r"\b(\d{4})")
+    )
+    for i, regex in enumerate(ExtractionConfig.DATE_REGEXES)
+)
+
+
+def _result_texts(ocr_results: List[OCRResult]) -> List[str]:
+    """Texts of the results; an OCRBatch already holds them as a list."""
+    if isinstance(ocr_results, OCRBatch):
+        return ocr_results.texts
+    return [r.text for r in ocr_results]
+
+
+def _lowered_line_texts(text_lines: List[List[OCRResult]]) -> List[str]:
+    """Join each line's texts with spaces and lowercase the result."""
+    return [" ".join(r.text for r in line).lower() for line in text_lines]
+
 
 class MerchantExtractor:
     """
@@ -38,6 +73,22 @@ class MerchantExtractor:
         r"^(struk|receipt|invoice|nota)\b",  # Document type labels
     ]
     
+    # All exclude patterns as one alternation, so a candidate is checked in
+    # a single match call
+    _EXCLUDE_RE = re.compile("|".join(f"(?:{p})" for p in EXCLUDE_PATTERNS))
+    
+    # Every exclude pattern is anchored at the start, so a candidate can only
+    # match if it begins with a digit, one of these characters, or one of
+    # these two-letter prefixes; anything else (most store names) is
+    # accepted without running the regex. Keep in sync with EXCLUDE_PATTERNS.
+    _EXCLUDE_FIRST_CHARS = frozenset("+-=_*")
+    _EXCLUDE_PREFIXES = frozenset([
+        "jl", "ja", "al", "ad",  # Address prefixes
+        "te", "ph", "hp", "wh", "wa",  # Phone prefixes, WhatsApp
+        "np", "ni", "no",  # ID numbers, number label (also "nota")
+        "st", "re", "in",  # Document type labels
+    ])
+    
     @classmethod
     def extract(cls, ocr_results: List[OCRResult], top_n_lines: int = 5) -> Optional[str]:
         """
@@ -55,15 +106,17 @@ class MerchantExtractor:
         
         candidates = []
         
+        # Normalize the top texts once; the fallback below reuses them
+        top_results = ocr_results[:max(top_n_lines, 3)]
+        top_texts = [r.text.strip() for r in top_results]
+        
         # Consider only top N lines
-        for result in ocr_results[:top_n_lines]:
-            text = result.text.strip()
-            
+        for result, text in zip(top_results[:top_n_lines], top_texts):
             if not text or len(text) < 2:
                 continue
             
             # Skip if matches exclude patterns
-            if cls._should_exclude(text):
+            if cls._should_exclude(text, text.lower()):
                 continue
             
             # Score the candidate
@@ -72,25 +125,30 @@ class MerchantExtractor:
         
         if not candidates:
             # Fallback to first non-empty line
-            for result in ocr_results[:3]:
-                if result.text.strip():
-                    return result.text.strip()
+            for text in top_texts[:3]:
+                if text:
+                    return text
             return None
         
         # Sort by score (descending) and take the best
-        candidates.sort(key=lambda x: (x[1], x[2]), reverse=True)
+        candidates.sort(key=itemgetter(1, 2), reverse=True)
         
         logger.info(f"Merchant candidates: {candidates[:3]}")
         return candidates[0][0]
     
     @classmethod
-    def _should_exclude(cls, text: str) -> bool:
-        """Check if text matches exclusion patterns."""
-        text_lower = text.lower()
-        for pattern in cls.EXCLUDE_PATTERNS:
-            if re.match(pattern, text_lower):
-                return True
-        return False
+    def _should_exclude(cls, text: str, text_lower: Optional[str] = None) -> bool:
+        """Check if text matches exclusion patterns (text_lower: text.lower(), if at hand)."""
+        if text_lower is None:
+            text_lower = text.lower()
+        first = text_lower[:1]
+        if (
+            text_lower[:2] not in cls._EXCLUDE_PREFIXES
+            and first not in cls._EXCLUDE_FIRST_CHARS
+            and not first.isdecimal()
+        ):
+            return False
+        return cls._EXCLUDE_RE.match(text_lower) is not None
     
     @classmethod
     def _score_merchant_candidate(cls, text: str, result: OCRResult) -> float:
@@ -98,7 +156,7 @@ class MerchantExtractor:
         score = 0.0
         
         # Bonus for being in ALL CAPS (common for store names)
-        if text.isupper() and len(text) > 3:
+        if len(text) > 3 and text.isupper():
             score += 2.0
         
         # Bonus for reasonable length (3-50 chars)
@@ -108,12 +166,12 @@ class MerchantExtractor:
         # Bonus for being near the top (lower line index)
         score += max(0, 3 - result.line_index)
         
-        # Penalty for containing only numbers
+        # Penalty for containing only numbers, bonus for containing letters
+        # (exclusive, so at most one more scan of the text; map() keeps the
+        # letter scan in C)
         if text.isdigit():
             score -= 5.0
-        
-        # Bonus for containing letters
-        if any(c.isalpha() for c in text):
+        elif any(map(str.isalpha, text)):
             score += 1.0
         
         return score
@@ -130,24 +188,39 @@ class DateExtractor:
     """
     
     @classmethod
-    def extract(cls, ocr_results: List[OCRResult]) -> Tuple[Optional[str], Optional[date]]:
+    def extract(
+        cls,
+        ocr_results: List[OCRResult],
+        full_text: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[date]]:
         """
         Extract transaction date from OCR results.
         
         Args:
             ocr_results: List of OCRResult objects
+            full_text: Texts of ocr_results joined with spaces, if already built
             
         Returns:
             Tuple of (raw_date_string, parsed_date) or (None, None)
         """
         # Combine all text for searching
-        full_text = " ".join(r.text for r in ocr_results)
+        if full_text is None:
+            full_text = " ".join(r.text for r in ocr_results)
         
-        for pattern in ExtractionConfig.DATE_PATTERNS:
-            match = re.search(pattern, full_text, re.IGNORECASE)
+        # First match of each pattern, from a single pass over the text
+        first_matches = {}
+        for match in _DATE_UNION.finditer(full_text):
+            first_matches.setdefault(match.lastgroup, match)
+        
+        # Patterns keep their priority order
+        for name, own_groups, has_month_name, year_first in _DATE_ALTERNATIVES:
+            match = first_matches.get(name)
             if match:
                 raw_string = match.group(0)
-                parsed_date = cls._parse_date_match(match, pattern)
+                # Same date strings recur across receipts; memoized
+                parsed_date = _parse_date_cached(
+                    match.groups()[own_groups], has_month_name, year_first
+                )
                 
                 if parsed_date and cls._is_valid_date(parsed_date):
                     logger.info(f"Extracted date: {raw_string} -> {parsed_date}")
@@ -157,16 +230,26 @@ class DateExtractor:
         return None, None
     
     @classmethod
-    def _parse_date_match(cls, match: re.Match, pattern: str) -> Optional[date]:
-        """Parse a regex match into a date object."""
-        groups = match.groups()
+    def _parse_date_match(
+        cls,
+        groups: Tuple[Optional[str], ...],
+        has_month_name: bool,
+        year_first: bool = False
+    ) -> Optional[date]:
+        """
+        Parse the captured groups of a date pattern into a date object.
         
+        Args:
+            groups: Groups captured by one of the DATE_PATTERNS
+            has_month_name: Pattern captures (day, month name, year)
+            year_first: Numeric pattern captures (year, month, day)
+        """
         try:
             # Filter out None values first
             valid_groups = [g for g in groups if g is not None]
             
             # Check if it's a text month pattern
-            if any(month in pattern.lower() for month in ["jan", "feb", "mar"]):
+            if has_month_name:
                 # DD MMM YYYY format - need at least 3 groups
                 if len(valid_groups) >= 3:
                     day = int(valid_groups[0])
@@ -187,7 +270,7 @@ class DateExtractor:
                 
                 if len(nums) >= 3:
                     # Determine format based on pattern
-                    if "YYYY" in pattern and pattern.find("YYYY") == 0:
+                    if year_first:
                         # YYYY/MM/DD
                         year, month, day = nums[0], nums[1], nums[2]
                     else:
@@ -222,6 +305,16 @@ class DateExtractor:
         return True
 
 
+@lru_cache(maxsize=4096)
+def _parse_date_cached(
+    groups: Tuple[Optional[str], ...],
+    has_month_name: bool,
+    year_first: bool
+) -> Optional[date]:
+    """Memoized DateExtractor._parse_date_match; dates are immutable."""
+    return DateExtractor._parse_date_match(groups, has_month_name, year_first)
+
+
 class TotalAmountExtractor:
     """
     Extracts the total/grand total amount from receipt.
@@ -232,11 +325,21 @@ class TotalAmountExtractor:
     3. Fall back to maximum amount if ambiguous
     """
     
+    # Dates, times and receipt/transaction IDs, which parse as numbers but
+    # are not amounts
+    _DATE_OR_ID_RE = re.compile(
+        r"^\d{2}[/\-]\d{2}[/\-]\d{2,4}$"  # Dates
+        r"|^\d{2}:\d{2}(?::\d{2})?$"  # Times
+        r"|^[A-Z]{2,}\d{6,}$"  # Receipt/transaction IDs
+    )
+    
     @classmethod
     def extract(
         cls,
         ocr_results: List[OCRResult],
-        text_lines: List[List[OCRResult]]
+        text_lines: List[List[OCRResult]],
+        line_texts_lower: Optional[List[str]] = None,
+        texts: Optional[List[str]] = None
     ) -> Tuple[Optional[str], Optional[float], float]:
         """
         Extract total amount from OCR results.
@@ -244,6 +347,8 @@ class TotalAmountExtractor:
         Args:
             ocr_results: List of OCRResult sorted by vertical position
             text_lines: Text organized into lines
+            line_texts_lower: Lowercased text of each line, if already built
+            texts: Text of each result in ocr_results, if already built
             
         Returns:
             Tuple of (raw_amount_string, parsed_value, confidence)
@@ -251,20 +356,31 @@ class TotalAmountExtractor:
         if not ocr_results:
             return None, None, 0.0
         
+        if line_texts_lower is None:
+            line_texts_lower = _lowered_line_texts(text_lines)
+        
+        # One pass over the lines parses every token once; the strategies
+        # below only pick from what it found
+        parsed_tokens, line_amounts, excluded, has_keyword = cls._scan_amounts(
+            text_lines, line_texts_lower
+        )
+        
         # Strategy 1: Keyword-based extraction
-        keyword_result = cls._extract_by_keyword(text_lines)
+        keyword_result = cls._extract_by_keyword(line_amounts, excluded, has_keyword)
         if keyword_result[1] is not None:
             logger.info(f"Total found by keyword: {keyword_result}")
             return keyword_result
         
         # Strategy 2: Position-based (bottom of receipt)
-        position_result = cls._extract_by_position(ocr_results, text_lines)
+        position_result = cls._extract_by_position(line_amounts, excluded)
         if position_result[1] is not None:
             logger.info(f"Total found by position: {position_result}")
             return position_result
         
         # Strategy 3: Maximum value fallback
-        max_result = cls._extract_max_value(ocr_results)
+        if texts is None:
+            texts = _result_texts(ocr_results)
+        max_result = cls._extract_max_value(texts, parsed_tokens)
         if max_result[1] is not None:
             logger.info(f"Total found by max value: {max_result}")
             return max_result
@@ -273,79 +389,99 @@ class TotalAmountExtractor:
         return None, None, 0.0
     
     @classmethod
-    def _extract_by_keyword(
-        cls, 
-        text_lines: List[List[OCRResult]]
-    ) -> Tuple[Optional[str], Optional[float], float]:
-        """Find total amount based on keywords."""
-        parser = CurrencyParser()
+    def _scan_amounts(
+        cls,
+        text_lines: List[List[OCRResult]],
+        line_texts_lower: List[str]
+    ) -> Tuple[Dict[str, Tuple[Optional[float], str]], List[List[Tuple[str, float, float]]], List[bool], List[bool]]:
+        """
+        Parse every token of every line once and flag each line.
         
-        for line in reversed(text_lines):
-            # Combine line text
-            line_text = " ".join(r.text for r in line).lower()
+        Returns:
+            Tuple of (parsed_tokens, line_amounts, excluded, has_keyword):
+            parsed_tokens maps token text to CurrencyParser.parse output,
+            line_amounts holds per line, left to right, the (raw, value,
+            confidence) of tokens worth at least 100, and the two flag lists
+            tell whether a line has exclude / total keywords (the exclude
+            flag is only computed for lines with a keyword or an amount).
+        """
+        parsed_tokens = {}
+        line_amounts = []
+        excluded = []
+        has_keyword = []
+        
+        for line, line_text in zip(text_lines, line_texts_lower):
+            amounts = []
+            for result in line:
+                if not CurrencyParser.has_digit(result.text):
+                    continue
+                parsed, raw = CurrencyParser.parse(result.text)
+                parsed_tokens[result.text] = (parsed, raw)
+                # Anything smaller is likely a quantity, not a total
+                if parsed is not None and parsed >= 100:
+                    amounts.append((raw, parsed, result.confidence))
             
-            # Check if line contains exclude keywords
-            if any(kw in line_text for kw in ExtractionConfig.EXCLUDE_KEYWORDS):
+            keyword = ExtractionConfig.TOTAL_KEYWORDS_REGEX.search(line_text) is not None
+            line_amounts.append(amounts)
+            has_keyword.append(keyword)
+            # The strategies only consult the exclude flag of keyword lines
+            # and lines with amounts, so other lines skip that scan
+            excluded.append(
+                (keyword or bool(amounts))
+                and ExtractionConfig.EXCLUDE_KEYWORDS_REGEX.search(line_text) is not None
+            )
+        
+        return parsed_tokens, line_amounts, excluded, has_keyword
+    
+    @classmethod
+    def _extract_by_keyword(
+        cls,
+        line_amounts: List[List[Tuple[str, float, float]]],
+        excluded: List[bool],
+        has_keyword: List[bool]
+    ) -> Tuple[Optional[str], Optional[float], float]:
+        """Find total amount based on keywords (lowest keyword line first)."""
+        for line_idx in range(len(line_amounts) - 1, -1, -1):
+            if excluded[line_idx] or not has_keyword[line_idx]:
                 continue
             
-            # Check for total keywords
-            for keyword in ExtractionConfig.TOTAL_KEYWORDS:
-                if keyword in line_text:
-                    # Found a keyword line, extract amount
-                    
-                    # Look for amount in this line (right of keyword)
-                    for result in reversed(line):  # Right-to-left
-                        parsed, raw = parser.parse(result.text)
-                        if parsed is not None and parsed > 0:
-                            # Validate it's not a small quantity
-                            if parsed >= 100:  # Minimum reasonable total
-                                return raw, parsed, 0.9
-                    
-                    # Also check the next line if amount not on same line
-                    line_idx = text_lines.index(line)
-                    if line_idx + 1 < len(text_lines):
-                        next_line = text_lines[line_idx + 1]
-                        for result in next_line:
-                            parsed, raw = parser.parse(result.text)
-                            if parsed is not None and parsed >= 100:
-                                return raw, parsed, 0.85
+            # Amount in this line, right of the keyword (rightmost wins)
+            if line_amounts[line_idx]:
+                raw, parsed, _ = line_amounts[line_idx][-1]
+                return raw, parsed, 0.9
+            
+            # Also check the next line if amount not on same line
+            if line_idx + 1 < len(line_amounts) and line_amounts[line_idx + 1]:
+                raw, parsed, _ = line_amounts[line_idx + 1][0]
+                return raw, parsed, 0.85
         
         return None, None, 0.0
     
     @classmethod
     def _extract_by_position(
         cls,
-        ocr_results: List[OCRResult],
-        text_lines: List[List[OCRResult]]
+        line_amounts: List[List[Tuple[str, float, float]]],
+        excluded: List[bool]
     ) -> Tuple[Optional[str], Optional[float], float]:
         """Extract amount from bottom portion of receipt."""
-        if not text_lines:
+        if not line_amounts:
             return None, None, 0.0
         
-        parser = CurrencyParser()
-        
         # Look at bottom 30% of lines
-        bottom_start = int(len(text_lines) * 0.7)
-        bottom_lines = text_lines[bottom_start:]
+        bottom_start = int(len(line_amounts) * 0.7)
         
-        amounts = []
+        # Get the largest amount from bottom section (first one on ties)
+        best = None
         
-        for line in bottom_lines:
-            line_text = " ".join(r.text for r in line).lower()
-            
+        for line_idx in range(bottom_start, len(line_amounts)):
             # Skip if contains exclude keywords
-            if any(kw in line_text for kw in ExtractionConfig.EXCLUDE_KEYWORDS):
+            if excluded[line_idx]:
                 continue
-            
-            for result in line:
-                parsed, raw = parser.parse(result.text)
-                if parsed is not None and parsed >= 100:
-                    amounts.append((raw, parsed, result.confidence))
+            for amount in line_amounts[line_idx]:
+                if best is None or amount[1] > best[1]:
+                    best = amount
         
-        if amounts:
-            # Get the largest amount from bottom section
-            amounts.sort(key=lambda x: x[1], reverse=True)
-            best = amounts[0]
+        if best is not None:
             return best[0], best[1], 0.75
         
         return None, None, 0.0
@@ -353,24 +489,28 @@ class TotalAmountExtractor:
     @classmethod
     def _extract_max_value(
         cls,
-        ocr_results: List[OCRResult]
+        texts: List[str],
+        parsed_tokens: Dict[str, Tuple[Optional[float], str]]
     ) -> Tuple[Optional[str], Optional[float], float]:
-        """Fall back to maximum monetary value found."""
-        parser = CurrencyParser()
-        amounts = []
-        
-        for result in ocr_results:
-            parsed, raw = parser.parse(result.text)
+        """Fall back to maximum monetary value found (texts in result order)."""
+        # Running maximum (first one on ties)
+        best = None
+        
+        for text in texts:
+            parsed_token = parsed_tokens.get(text)
+            if parsed_token is None:
+                if not CurrencyParser.has_digit(text):
+                    continue
+                # Text not seen while scanning text_lines; parse it here
+                parsed_token = CurrencyParser.parse(text)
+            parsed, raw = parsed_token
             # Filter out likely dates/IDs (often 6-8 digit numbers in specific formats)
-            if parsed is not None and parsed >= 100:
+            if parsed is not None and parsed >= 100 and (best is None or parsed > best[1]):
                 # Skip if looks like a date or ID
-                if not cls._looks_like_date_or_id(result.text):
-                    amounts.append((raw, parsed, result.confidence))
+                if not cls._looks_like_date_or_id(text):
+                    best = (raw, parsed)
         
-        if amounts:
-            # Get maximum
-            amounts.sort(key=lambda x: x[1], reverse=True)
-            best = amounts[0]
+        if best is not None:
             return best[0], best[1], 0.6  # Lower confidence for fallback
         
         return None, None, 0.0
@@ -378,19 +518,7 @@ class TotalAmountExtractor:
     @classmethod
     def _looks_like_date_or_id(cls, text: str) -> bool:
         """Check if text looks like a date or transaction ID."""
-        # Check for date patterns
-        if re.match(r"^\d{2}[/\-]\d{2}[/\-]\d{2,4}$", text):
-            return True
-        
-        # Check for time patterns
-        if re.match(r"^\d{2}:\d{2}(:\d{2})?$", text):
-            return True
-        
-        # Check for receipt/transaction ID patterns
-        if re.match(r"^[A-Z]{2,}\d{6,}$", text):
-            return True
-        
-        return False
+        return cls._DATE_OR_ID_RE.match(text) is not None
 
 
 class ReceiptExtractor:
@@ -406,31 +534,44 @@ class ReceiptExtractor:
     def extract_all(
         self,
         ocr_results: List[OCRResult],
-        text_lines: List[List[OCRResult]]
+        text_lines: Optional[List[List[OCRResult]]] = None
     ) -> dict:
         """
         Extract all fields from OCR results.
         
         Args:
             ocr_results: List of OCRResult objects
-            text_lines: Text organized into lines
+            text_lines: Text organized into lines; grouped here by vertical
+                position (group_into_lines) when not given
             
         Returns:
             Dictionary with extracted fields
         """
+        if text_lines is None:
+            text_lines = group_into_lines(ocr_results)
+        
+        # Text the extractors search, built once for all of them
+        texts = _result_texts(ocr_results)
+        full_text = " ".join(texts)
+        line_texts_lower = _lowered_line_texts(text_lines)
+        
         # Extract merchant
         merchant_name = self.merchant_extractor.extract(ocr_results)
         
         # Extract date
-        date_raw, date_parsed = self.date_extractor.extract(ocr_results)
+        date_raw, date_parsed = self.date_extractor.extract(ocr_results, full_text=full_text)
         
         # Extract total
         total_raw, total_value, total_confidence = self.total_extractor.extract(
-            ocr_results, text_lines
+            ocr_results, text_lines, line_texts_lower=line_texts_lower, texts=texts
         )
         
         # Calculate overall confidence
-        ocr_avg_confidence = sum(r.confidence for r in ocr_results) / len(ocr_results) if ocr_results else 0
+        if isinstance(ocr_results, OCRBatch):
+            confidences = ocr_results.confidences.tolist()
+        else:
+            confidences = [r.confidence for r in ocr_results]
+        ocr_avg_confidence = sum(confidences) / len(confidences) if confidences else 0
         
         # Weight: OCR confidence (30%), total extraction confidence (70%)
         overall_confidence = (ocr_avg_confidence * 0.3) + (total_confidence * 0.7)
@@ -4,13 +4,26 @@ Handles common receipt issues: low light, crumpled paper, shadows, and skewed im
 """
 import cv2
 import numpy as np
-from typing import Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence, Tuple, Optional, Union
 import logging
+import os
+import threading
 
 from app.config import ImageConfig
 
 logger = logging.getLogger(__name__)
 
+# Optional libjpeg-turbo binding for decoding JPEG uploads; cv2.imdecode is
+# used when PyTurboJPEG or the shared library is missing
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJPF_GRAY
+    _turbojpeg: Optional["TurboJPEG"] = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _turbojpeg = None
+
+_JPEG_SOI = b"\xff\xd8\xff"
+
 
 class ReceiptPreprocessor:
     """
@@ -25,6 +38,29 @@ class ReceiptPreprocessor:
     
     def __init__(self):
         self.config = ImageConfig()
+        # Per-thread state (scratch buffers); one instance serves a thread pool
+        self._local = threading.local()
+        # Worker threads for process_batch, created on first use
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+    
+    def _scratch(self, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Per-thread uint8 buffer of the given shape, reused across images.
+        
+        Intermediate steps write into these instead of allocating a fresh
+        image each time. Buffers start at the MAX_WIDTH x MAX_HEIGHT size and
+        only grow (e.g. for a rotated image); the returned view is contiguous.
+        """
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        size = int(np.prod(shape))
+        buffer = buffers.get(name)
+        if buffer is None or buffer.size < size:
+            capacity = max(size, self.config.MAX_WIDTH * self.config.MAX_HEIGHT)
+            buffer = buffers[name] = np.empty(capacity, dtype=np.uint8)
+        return buffer[:size].reshape(shape)
     
     def process(self, image: np.ndarray) -> np.ndarray:
         """
@@ -34,15 +70,17 @@ class ReceiptPreprocessor:
             image: Input image as numpy array (BGR format from cv2.imread)
             
         Returns:
-            Preprocessed image ready for OCR
+            Preprocessed image ready for OCR (grayscale unless OUTPUT_BGR)
         """
         logger.info("Starting image preprocessing pipeline")
         
-        # Step 1: Validate and resize if needed
-        image = self._validate_and_resize(image)
+        # Step 1: Validate
+        self._validate(image)
         
-        # Step 2: Convert to grayscale
-        gray = self._to_grayscale(image)
+        # Step 2: Convert to grayscale, then resize if needed (grayscale
+        # first so the resize moves 1 byte per pixel instead of 3). Uploads
+        # arrive already gray and size-capped from load_image_from_bytes
+        gray = self._resize(self._to_grayscale(image))
         
         # Step 3: Deskew the image
         deskewed = self._deskew(gray)
@@ -53,19 +91,66 @@ class ReceiptPreprocessor:
         # Step 5: Enhance contrast
         enhanced = self._enhance_contrast(denoised)
         
-        # Step 6: Convert back to 3-channel for PaddleOCR compatibility
-        # PaddleOCR expects 3-channel images
-        if len(enhanced.shape) == 2:
+        # Step 6: Optionally convert back to 3-channel. ReceiptOCR broadcasts
+        # grayscale for PaddleOCR itself, which avoids tripling the bytes here
+        if self.config.OUTPUT_BGR:
             enhanced = cv2.cvtColor(enhanced, cv2.COLOR_GRAY2BGR)
         
         logger.info("Image preprocessing completed")
         return enhanced
     
-    def _validate_and_resize(self, image: np.ndarray) -> np.ndarray:
-        """Validate image dimensions and resize if too large."""
+    def process_batch(self, images: Sequence[np.ndarray]) -> List[np.ndarray]:
+        """
+        Preprocess several images in parallel.
+        
+        OpenCV releases the GIL, so the images run concurrently on a thread
+        pool kept for the lifetime of this preprocessor; each worker thread
+        reuses its own scratch buffers and CLAHE object across batches.
+        
+        Standalone helper for scripts and library callers: the API service
+        does not use it (ReceiptPipeline preprocesses on its own
+        PREPROCESS_WORKERS pool). Callers that use it must call close()
+        when done, or the worker threads stay alive.
+        
+        Args:
+            images: Input images (BGR or grayscale)
+            
+        Returns:
+            Preprocessed images, in input order
+            
+        Raises:
+            ValueError: If any image is invalid
+        """
+        if len(images) <= 1:
+            return [self.process(image) for image in images]
+        
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, (os.cpu_count() or 2) // 2),
+                    thread_name_prefix="preprocess"
+                )
+        return list(self._executor.map(self.process, images))
+    
+    def close(self) -> None:
+        """Shut down the process_batch worker threads (if started); safe to call twice."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+    
+    @staticmethod
+    def _validate(image: np.ndarray) -> None:
+        """Reject empty or non-uint8 images."""
         if image is None or image.size == 0:
             raise ValueError("Invalid image: empty or None")
-        
+        # Every step works on 1 byte per pixel; a wider dtype would multiply
+        # the memory traffic of the whole pipeline
+        if image.dtype != np.uint8:
+            raise ValueError(f"Invalid image: expected uint8 pixels, got {image.dtype}")
+    
+    def _resize(self, image: np.ndarray) -> np.ndarray:
+        """Resize the image if it exceeds MAX_WIDTH x MAX_HEIGHT."""
         height, width = image.shape[:2]
         
         # Check if resize is needed
@@ -76,119 +161,384 @@ class ReceiptPreprocessor:
             )
             new_width = int(width * scale)
             new_height = int(height * scale)
-            image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
-            logger.info(f"Image resized from {width}x{height} to {new_width}x{new_height}")
+            image = cv2.resize(
+                image, (new_width, new_height),
+                dst=self._scratch("resized", (new_height, new_width) + image.shape[2:]),
+                interpolation=cv2.INTER_AREA
+            )
+            logger.info("Image resized from %dx%d to %dx%d", width, height, new_width, new_height)
         
         return image
     
     def _to_grayscale(self, image: np.ndarray) -> np.ndarray:
         """Convert image to grayscale if needed."""
         if len(image.shape) == 3:
-            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._scratch("gray", image.shape[:2]))
         return image
     
     def _deskew(self, image: np.ndarray) -> np.ndarray:
         """
-        Deskew the image using Hough Line Transform.
-        Detects the dominant angle of text lines and rotates to correct.
+        Deskew the image.
+        Detects the dominant angle of text lines and rotates to correct,
+        using a projection profile or the Hough Line Transform
+        (ImageConfig.DESKEW_METHOD).
+        """
+        if self.config.DESKEW_METHOD == "hough":
+            median_angle = self._hough_angle(image)
+        else:
+            median_angle = self._projection_angle(image)
+        if median_angle is None:
+            return image
+        
+        # Rotate the image to correct skew
+        height, width = image.shape[:2]
+        rotation_matrix, size = self._rotation_for(median_angle, width, height)
+        
+        # Only read by _denoise, so it can live in a scratch buffer too
+        rotated = cv2.warpAffine(
+            image,
+            rotation_matrix,
+            size,
+            dst=self._scratch("rotated", (size[1], size[0])),
+            flags=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_REPLICATE
+        )
+        
+        return rotated
+    
+    def _thumbnail(self, image: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Shrink an image to fit DESKEW_SIZE for angle detection.
+        
+        Angles are scale-invariant, so detection runs on the thumbnail and
+        the rotation is applied to the full-resolution image.
+        
+        Returns:
+            Tuple of (thumbnail, scale); the original image when already small
         """
+        height, width = image.shape[:2]
+        scale = min(1.0, self.config.DESKEW_SIZE / max(height, width))
+        if scale < 1.0:
+            # Nearest-neighbour is one load per output pixel, several times
+            # faster than INTER_AREA; the aliasing it adds is harmless for
+            # measuring an angle. The image OCR sees keeps INTER_AREA (_resize)
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+        return image, scale
+    
+    def _hough_angle(self, image: np.ndarray) -> Optional[float]:
+        """Skew angle from the median of Hough line segments (None if minimal)."""
+        image, scale = self._thumbnail(image)
+        
         # Apply edge detection
         edges = cv2.Canny(image, 50, 150, apertureSize=3)
         
-        # Detect lines using Hough Transform
+        # Detect lines using Hough Transform; pixel thresholds follow the
+        # thumbnail scale so the same segments qualify as at full size
         lines = cv2.HoughLinesP(
             edges,
             rho=1,
             theta=np.pi / 180,
-            threshold=100,
-            minLineLength=100,
-            maxLineGap=10
+            threshold=max(1, int(100 * scale)),
+            minLineLength=100 * scale,
+            maxLineGap=max(1.0, 10 * scale)
         )
         
+        return self._median_line_angle(lines)
+    
+    def _projection_angle(self, image: np.ndarray) -> Optional[float]:
+        """
+        Skew angle from horizontal projection profiles (None if minimal).
+        
+        Text rows give the sharpest row-sum profile when they are level, so
+        the ink pixels of a small thumbnail are projected onto the rows of
+        every candidate rotation in one vectorized pass and the angle with
+        the largest profile gradient wins. A 0.5° sweep over
+        ±DESKEW_MAX_ANGLE is refined in 0.1° steps around the best angle.
+        """
+        image, _ = self._thumbnail(image)
+        
+        # Dark text on light paper -> ink pixels
+        _, ink = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+        ys, xs = np.nonzero(ink)
+        if len(ys) == 0 or len(ys) > ink.size // 2:
+            logger.info("No text profile found for deskewing, returning original")
+            return None
+        # A regular subsample keeps the (angles x points) work bounded
+        step = len(ys) // 50000 + 1
+        ys = ys[::step].astype(np.float32)
+        xs = xs[::step].astype(np.float32)
+        
+        max_angle = self.config.DESKEW_MAX_ANGLE
+        coarse = np.arange(-max_angle, max_angle + 0.25, 0.5)
+        best = self._best_profile_angle(ys, xs, coarse)
+        median_angle = self._best_profile_angle(ys, xs, best + np.arange(-0.4, 0.45, 0.1))
+        
+        # Only correct if the skew is significant (> 0.5°)
+        if abs(median_angle) < 0.5:
+            logger.info("Skew angle %.2f° is minimal, skipping rotation", median_angle)
+            return None
+        
+        logger.info("Detected skew angle: %.2f°, correcting...", median_angle)
+        return median_angle
+    
+    @staticmethod
+    def _best_profile_angle(ys: np.ndarray, xs: np.ndarray, angles: np.ndarray) -> float:
+        """Angle (degrees) whose rotation gives the sharpest row profile of the points."""
+        radians = np.radians(angles, dtype=np.float32)[:, None]
+        # Row of each point after rotating by each angle (cv2.getRotationMatrix2D convention)
+        rows = np.rint(ys * np.cos(radians) - xs * np.sin(radians)).astype(np.int32)
+        rows -= rows.min()
+        n_rows = int(rows.max()) + 1
+        rows += np.arange(len(angles))[:, None] * n_rows
+        profiles = np.bincount(rows.ravel(), minlength=len(angles) * n_rows).reshape(len(angles), n_rows)
+        scores = (np.diff(profiles, axis=1).astype(np.float64) ** 2).sum(axis=1)
+        return float(angles[int(np.argmax(scores))])
+    
+    @staticmethod
+    def _median_line_angle(lines: Optional[np.ndarray]) -> Optional[float]:
+        """
+        Median angle of the near-horizontal Hough segments.
+        
+        Returns:
+            Angle in degrees, or None when there is no significant skew
+        """
         if lines is None or len(lines) == 0:
             logger.info("No lines detected for deskewing, returning original")
-            return image
+            return None
         
-        # Calculate angles of detected lines
-        angles = []
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            if x2 - x1 != 0:  # Avoid division by zero
-                angle = np.degrees(np.arctan2(y2 - y1, x2 - x1))
-                # Only consider near-horizontal lines (within ±45°)
-                if -45 < angle < 45:
-                    angles.append(angle)
-        
-        if not angles:
+        # Calculate angles of detected lines ((N, 1, 4) or (N, 4) depending on OpenCV)
+        segments = lines.reshape(-1, 4)
+        dx = segments[:, 2] - segments[:, 0]
+        dy = segments[:, 3] - segments[:, 1]
+        non_vertical = dx != 0  # Avoid division by zero
+        angles = np.degrees(np.arctan2(dy[non_vertical], dx[non_vertical]))
+        # Only consider near-horizontal lines (within ±45°)
+        angles = angles[(angles > -45) & (angles < 45)]
+        
+        if angles.size == 0:
             logger.info("No suitable angles found for deskewing")
-            return image
+            return None
         
-        # Use median angle to avoid outliers
-        median_angle = np.median(angles)
+        # Use median angle to avoid outliers. A partial partition finds it in
+        # O(n); for an even count this is the upper middle value, not a mean
+        k = angles.size // 2
+        median_angle = float(np.partition(angles, k)[k])
         
         # Only correct if the skew is significant (> 0.5°)
         if abs(median_angle) < 0.5:
-            logger.info(f"Skew angle {median_angle:.2f}° is minimal, skipping rotation")
-            return image
-        
-        logger.info(f"Detected skew angle: {median_angle:.2f}°, correcting...")
+            logger.info("Skew angle %.2f° is minimal, skipping rotation", median_angle)
+            return None
         
-        # Rotate the image to correct skew
-        height, width = image.shape[:2]
+        logger.info("Detected skew angle: %.2f°, correcting...", median_angle)
+        return median_angle
+    
+    @staticmethod
+    def _rotation_for(angle: float, width: int, height: int) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """Rotation matrix and output size that rotate by angle without clipping."""
         center = (width // 2, height // 2)
-        rotation_matrix = cv2.getRotationMatrix2D(center, median_angle, 1.0)
+        rotation_matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
         
-        # Calculate new image bounds to avoid clipping
-        cos = np.abs(rotation_matrix[0, 0])
-        sin = np.abs(rotation_matrix[0, 1])
+        # Calculate new image bounds to avoid clipping (plain floats, no
+        # numpy scalars)
+        cos = abs(float(rotation_matrix[0, 0]))
+        sin = abs(float(rotation_matrix[0, 1]))
         new_width = int((height * sin) + (width * cos))
         new_height = int((height * cos) + (width * sin))
         
         rotation_matrix[0, 2] += (new_width / 2) - center[0]
         rotation_matrix[1, 2] += (new_height / 2) - center[1]
         
-        rotated = cv2.warpAffine(
-            image,
-            rotation_matrix,
-            (new_width, new_height),
-            flags=cv2.INTER_LINEAR,
-            borderMode=cv2.BORDER_REPLICATE
-        )
-        
-        return rotated
+        return rotation_matrix, (new_width, new_height)
     
     def _denoise(self, image: np.ndarray) -> np.ndarray:
         """
         Apply denoising to reduce noise from thermal/dot matrix printing.
-        Using bilateralFilter which is much faster than fastNlMeansDenoising
-        while still preserving edges for OCR.
+        A small stackBlur by default; bilateralFilter or fastNlMeansDenoising
+        can be selected with ImageConfig.DENOISE_METHOD.
         """
-        # bilateralFilter: d=9 (diameter), sigmaColor=75, sigmaSpace=75
-        # This is 10-50x faster than fastNlMeansDenoising while preserving edges
-        return cv2.bilateralFilter(image, d=9, sigmaColor=75, sigmaSpace=75)
+        method = self.config.DENOISE_METHOD
+        if method == "blur":
+            # Box-blur approximation of a Gaussian, vectorized inside OpenCV
+            return cv2.stackBlur(image, (3, 3), dst=self._scratch("denoised", image.shape))
+        strength = self.config.DENOISE_STRENGTH
+        if method == "nlmeans":
+            # Opt-in heavy path for very noisy images (~200x slower)
+            return cv2.fastNlMeansDenoising(
+                image, None, h=strength, templateWindowSize=7, searchWindowSize=21
+            )
+        # A 5px neighbourhood is enough for text strokes and runs ~4x faster
+        # than d=9; DENOISE_STRENGTH keeps acting as the NLMeans-style h knob
+        return cv2.bilateralFilter(
+            image, d=5, sigmaColor=strength * 5, sigmaSpace=50,
+            dst=self._scratch("denoised", image.shape)
+        )
     
     def _enhance_contrast(self, image: np.ndarray) -> np.ndarray:
         """
          pake CLAHE (Contrast Limited Adaptive Histogram Equalization).
         """
-        clahe = cv2.createCLAHE(
-            clipLimit=self.config.CLAHE_CLIP_LIMIT,
-            tileGridSize=self.config.CLAHE_TILE_SIZE
-        )
+        # Created once per thread: CLAHE keeps internal buffers between calls,
+        # so one instance must not be shared by concurrent preprocess workers
+        clahe = getattr(self._local, "clahe", None)
+        if clahe is None:
+            clahe = self._local.clahe = cv2.createCLAHE(
+                clipLimit=self.config.CLAHE_CLIP_LIMIT,
+                tileGridSize=self.config.CLAHE_TILE_SIZE
+            )
+        # Not a scratch buffer: this is the image handed on to OCR
         return clahe.apply(image)
     
     def apply_adaptive_threshold(self, image: np.ndarray) -> np.ndarray:
-       
+        """Binarize against the local mean (box filter) or Gaussian-weighted mean."""
+        if self.config.THRESHOLD_METHOD == "gaussian":
+            method = cv2.ADAPTIVE_THRESH_GAUSSIAN_C
+        else:
+            method = cv2.ADAPTIVE_THRESH_MEAN_C
         return cv2.adaptiveThreshold(
             image,
             255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            method,
             cv2.THRESH_BINARY,
             blockSize=11,
             C=2
         )
 
 
+def cuda_available() -> bool:
+    """Whether this OpenCV build has CUDA support and a usable device."""
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except (AttributeError, cv2.error):
+        return False
+
+
+class ReceiptPreprocessorCUDA(ReceiptPreprocessor):
+    """
+    ReceiptPreprocessor running every step on the GPU via cv2.cuda.
+    
+    The image is uploaded once and all steps are queued on one CUDA stream;
+    only the Hough segments (to measure the skew angle) and the final image
+    are downloaded. Requires an OpenCV build with CUDA; see create_preprocessor.
+    """
+    
+    def _gpu_ops(self):
+        """This thread's (canny, hough, clahe) CUDA algorithm objects."""
+        # CUDA filter objects keep internal buffers, so each thread gets its own
+        ops = getattr(self._local, "ops", None)
+        if ops is None:
+            ops = (
+                cv2.cuda.createCannyEdgeDetector(50, 150, 3),
+                cv2.cuda.createHoughSegmentDetector(1, np.pi / 180, 100, 10),
+                cv2.cuda.createCLAHE(
+                    clipLimit=self.config.CLAHE_CLIP_LIMIT,
+                    tileGridSize=self.config.CLAHE_TILE_SIZE
+                ),
+            )
+            self._local.ops = ops
+        return ops
+    
+    def process(self, image: np.ndarray) -> np.ndarray:
+        """Apply the preprocessing pipeline on the GPU (same steps as the CPU path)."""
+        logger.info("Starting image preprocessing pipeline (CUDA)")
+        
+        self._validate(image)
+        
+        canny, hough, clahe = self._gpu_ops()
+        stream = cv2.cuda.Stream()
+        
+        gpu = cv2.cuda.GpuMat()
+        gpu.upload(image, stream)
+        
+        # Step 1: Grayscale
+        if image.ndim == 3:
+            gpu = cv2.cuda.cvtColor(gpu, cv2.COLOR_BGR2GRAY, stream=stream)
+        
+        # Step 2: Resize if needed
+        height, width = image.shape[:2]
+        if width > self.config.MAX_WIDTH or height > self.config.MAX_HEIGHT:
+            scale = min(self.config.MAX_WIDTH / width, self.config.MAX_HEIGHT / height)
+            width, height = int(width * scale), int(height * scale)
+            gpu = cv2.cuda.resize(gpu, (width, height), interpolation=cv2.INTER_AREA, stream=stream)
+        
+        # Step 3: Deskew (the segment list is the only mid-pipeline download)
+        edges = canny.detect(gpu, stream=stream)
+        segments = hough.detect(edges, stream=stream).download(stream)
+        stream.waitForCompletion()
+        median_angle = self._median_line_angle(
+            segments.reshape(-1, 1, 4) if segments is not None else None
+        )
+        if median_angle is not None:
+            rotation_matrix, size = self._rotation_for(median_angle, width, height)
+            gpu = cv2.cuda.warpAffine(
+                gpu, rotation_matrix, size,
+                flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE, stream=stream
+            )
+        
+        # Step 4: Denoise (bilateral for every DENOISE_METHOD; stackBlur and
+        # NLMeans have no cv2.cuda equivalent used here)
+        gpu = cv2.cuda.bilateralFilter(
+            gpu, 5, self.config.DENOISE_STRENGTH * 5, 50, stream=stream
+        )
+        
+        # Step 5: Enhance contrast
+        gpu = clahe.apply(gpu, stream)
+        
+        # Step 6: Optional 3-channel conversion, then the single download
+        if self.config.OUTPUT_BGR:
+            gpu = cv2.cuda.cvtColor(gpu, cv2.COLOR_GRAY2BGR, stream=stream)
+        enhanced = gpu.download(stream)
+        stream.waitForCompletion()
+        
+        logger.info("Image preprocessing completed")
+        return enhanced
+
+
+def create_preprocessor(use_cuda: bool = ImageConfig.USE_CUDA) -> ReceiptPreprocessor:
+    """
+    Create the preprocessor for this machine.
+    
+    Args:
+        use_cuda: Run preprocessing on the GPU when OpenCV supports it
+        
+    Returns:
+        ReceiptPreprocessorCUDA if requested and available, else ReceiptPreprocessor
+    """
+    if use_cuda:
+        if cuda_available():
+            logger.info("Using CUDA image preprocessing")
+            return ReceiptPreprocessorCUDA()
+        logger.warning("USE_CUDA is set but no CUDA device is available; preprocessing on CPU")
+    return ReceiptPreprocessor()
+
+
+def downscale_if_large(image: np.ndarray) -> np.ndarray:
+    """
+    Shrink an image so its longest side fits the ImageConfig size cap.
+    
+    OCR cost grows with pixel count, so oversize photos are reduced right
+    after decoding, before any preprocessing step touches them.
+    
+    Args:
+        image: Decoded image as numpy array
+        
+    Returns:
+        The original image, or a downscaled copy if it exceeded the cap
+    """
+    height, width = image.shape[:2]
+    longest = max(height, width)
+    cap = max(ImageConfig.MAX_WIDTH, ImageConfig.MAX_HEIGHT)
+    
+    if longest <= cap:
+        return image
+    
+    scale = cap / longest
+    new_width = int(width * scale)
+    new_height = int(height * scale)
+    logger.info("Downscaling image from %dx%d to %dx%d", width, height, new_width, new_height)
+    # INTER_AREA gives the best quality when shrinking
+    return cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
+
+
 def load_image(image_path: str) -> np.ndarray:
     """
     Load an image from file path.
@@ -219,29 +569,53 @@ def load_image(image_path: str) -> np.ndarray:
     if image is None:
         raise ValueError(f"Failed to load image: {image_path}")
     
-    return image
+    return downscale_if_large(image)
 
 
-def load_image_from_bytes(image_bytes: bytes) -> np.ndarray:
+def load_image_from_bytes(
+    image_bytes: Union[bytes, bytearray, memoryview],
+    grayscale: bool = False
+) -> np.ndarray:
     """
     Load an image from bytes (for API uploads).
     
     Args:
-        image_bytes: Raw image bytes
+        image_bytes: Raw image bytes; any bytes-like buffer is read in place
+        grayscale: Decode straight to one channel. ReceiptPreprocessor
+            starts with a grayscale conversion anyway, so the decoder and the
+            size cap below then touch 1 byte per pixel instead of 3
         
     Returns:
-        Image as numpy array in BGR format
+        Image as numpy array in BGR format (single-channel if grayscale)
         
     Raises:
         ValueError: If image cannot be decoded
     """
-    # Convert bytes to numpy array
+    # JPEGs without EXIF go straight through libjpeg-turbo. EXIF ones stay on
+    # cv2.imdecode, which applies the orientation tag (TurboJPEG does not)
+    if (
+        _turbojpeg is not None
+        and bytes(image_bytes[:3]) == _JPEG_SOI
+        and b"Exif" not in bytes(image_bytes[:64])
+    ):
+        try:
+            image = _turbojpeg.decode(
+                image_bytes, pixel_format=TJPF_GRAY if grayscale else TJPF_BGR
+            )
+        except OSError:
+            image = None  # let cv2 have a go (and raise if it can't either)
+        if image is not None:
+            if grayscale:
+                image = image.reshape(image.shape[:2])  # drop the (H, W, 1) channel axis
+            return downscale_if_large(image)
+    
+    # Zero-copy uint8 view of the buffer
     nparr = np.frombuffer(image_bytes, np.uint8)
     
     # Decode image
-    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    image = cv2.imdecode(nparr, cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
     
     if image is None:
         raise ValueError("Failed to decode image from bytes")
     
-    return image
+    return downscale_if_large(image)
@@ -12,10 +12,21 @@ logger = logging.getLogger(__name__)
 
 from app.ocr.ocr_engine import ReceiptOCR
 
-def test_server_ocr():
+
+class MockPaddleOCR:
+    """Stand-in for PaddleOCR that finds no text (no models are loaded)."""
+
+    def ocr(self, images):
+        return [None] * (len(images) if isinstance(images, list) else 1)
+
+
+def test_server_ocr(mock=False):
     print("Initializing ReceiptOCR...")
     try:
         ocr_engine = ReceiptOCR()
+        if mock:
+            # Smoke-test the wrapper only; skips the multi-second model load
+            ocr_engine._ocr = MockPaddleOCR()
         
         # Create dummy image (white background, black text)
         # Match the shape/type likely produced by preprocessor
@@ -33,4 +44,4 @@ def test_server_ocr():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    test_server_ocr()
+    test_server_ocr(mock="--mock" in sys.argv)
@@ -0,0 +1,28 @@
+"""
+Unit tests for the extraction result cache.
+"""
+from app.api.cache import ExtractionCache
+
+
+class TestExtractionCache:
+    """Test cases for ExtractionCache."""
+
+    def test_same_bytes_same_key(self):
+        """Test identical uploads hash to the same key."""
+        assert ExtractionCache.key_for(b"receipt") == ExtractionCache.key_for(b"receipt")
+        assert ExtractionCache.key_for(b"receipt") != ExtractionCache.key_for(b"receipt2")
+
+    def test_get_missing(self):
+        """Test a miss returns None."""
+        assert ExtractionCache().get(1) is None
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest untouched entry is evicted when full."""
+        cache = ExtractionCache(max_size=2)
+        cache.put(1, {"merchant_name": "A"})
+        cache.put(2, {"merchant_name": "B"})
+        cache.get(1)
+        cache.put(3, {"merchant_name": "C"})
+        assert len(cache) == 2
+        assert cache.get(2) is None
+        assert cache.get(1) == {"merchant_name": "A"}
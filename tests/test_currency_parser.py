@@ -112,6 +112,12 @@ class TestCurrencyParser:
     def test_is_valid_amount_too_large(self):
         """Test amount exceeding max value."""
         assert CurrencyParser.is_valid_amount(1e15) is False
+    
+    def test_has_digit(self):
+        """Test digit pre-check used to skip non-numeric tokens."""
+        assert CurrencyParser.has_digit("Rp 50.000") is True
+        assert CurrencyParser.has_digit("Terima kasih") is False
+        assert CurrencyParser.has_digit("") is False
 
 
 class TestExtractAllAmounts:
@@ -11,22 +11,47 @@ from app.parsing.extractors import (
     TotalAmountExtractor,
     ReceiptExtractor
 )
-from app.ocr.ocr_engine import OCRResult
+from app.ocr.ocr_engine import OCRResult, OCRBatch
 
 
 def create_ocr_result(text: str, y_position: float, confidence: float = 0.95) -> OCRResult:
     """Helper to create OCRResult for testing."""
-    # Create a simple bounding box centered at y_position
-    bbox = [
-        [0, y_position - 10],
-        [100, y_position - 10],
-        [100, y_position + 10],
-        [0, y_position + 10]
-    ]
+    # Create a simple bounding box centered at y_position (one flat tuple
+    # instead of four point lists)
+    top, bottom = y_position - 10, y_position + 10
+    bbox = (0.0, top, 100.0, top, 100.0, bottom, 0.0, bottom)
     result = OCRResult(text=text, confidence=confidence, bbox=bbox)
     return result
 
 
+@pytest.fixture(scope="module")
+def full_receipt():
+    """A complete receipt as (results, text_lines), built once for the module."""
+    results = [
+        create_ocr_result("INDOMARET", 10),
+        create_ocr_result("Jl. Sudirman 123", 50),
+        create_ocr_result("11/01/2026 14:30", 90),
+        create_ocr_result("Item 1", 130),
+        create_ocr_result("25.000", 130),
+        create_ocr_result("Item 2", 170),
+        create_ocr_result("30.000", 170),
+        create_ocr_result("Total", 210),
+        create_ocr_result("Rp 55.000", 210),
+    ]
+    for i, r in enumerate(results):
+        r.line_index = i
+    
+    text_lines = [
+        [results[0]],
+        [results[1]],
+        [results[2]],
+        [results[3], results[4]],
+        [results[5], results[6]],
+        [results[7], results[8]],
+    ]
+    return results, text_lines
+
+
 class TestMerchantExtractor:
     """Test cases for MerchantExtractor class."""
     
@@ -106,6 +131,14 @@ class TestDateExtractor:
         raw, parsed = DateExtractor.extract(results)
         assert parsed == date(2026, 1, 10)
     
+    def test_extract_yyyy_mm_dd(self):
+        """Test extracting YYYY-MM-DD format."""
+        results = [
+            create_ocr_result("2026-01-09 14:22", 100),
+        ]
+        raw, parsed = DateExtractor.extract(results)
+        assert parsed == date(2026, 1, 9)
+    
     def test_extract_text_month(self):
         """Test extracting 'DD MMM YYYY' format."""
         results = [
@@ -217,6 +250,19 @@ class TestTotalAmountExtractor:
         # or fallback which has 0.6. Either way, we expect a reasonable confidence.
         assert confidence >= 0.6
     
+    def test_packed_results(self):
+        """Test results packed into an OCRBatch give the same total as the list."""
+        results = [
+            create_ocr_result("Item 1", 10),
+            create_ocr_result("10.000", 30),
+            create_ocr_result("Total", 100),
+            create_ocr_result("Rp 150.000", 100),
+        ]
+        batch = OCRBatch.from_results(results)
+        text_lines = [[batch[0]], [batch[1]], [batch[2], batch[3]]]
+        
+        assert TotalAmountExtractor.extract(batch, text_lines) == ("Rp 150.000", 150000.0, 0.9)
+    
     def test_empty_results(self):
         """Test with empty results."""
         raw, value, confidence = TotalAmountExtractor.extract([], [])
@@ -228,30 +274,9 @@ class TestTotalAmountExtractor:
 class TestReceiptExtractor:
     """Test cases for ReceiptExtractor orchestrator class."""
     
-    def test_extract_all_fields(self):
+    def test_extract_all_fields(self, full_receipt):
         """Test extracting all fields from a complete receipt."""
-        results = [
-            create_ocr_result("INDOMARET", 10),
-            create_ocr_result("Jl. Sudirman 123", 30),
-            create_ocr_result("11/01/2026 14:30", 50),
-            create_ocr_result("Item 1", 70),
-            create_ocr_result("25.000", 70),
-            create_ocr_result("Item 2", 90),
-            create_ocr_result("30.000", 90),
-            create_ocr_result("Total", 130),
-            create_ocr_result("Rp 55.000", 130),
-        ]
-        for i, r in enumerate(results):
-            r.line_index = i
-        
-        text_lines = [
-            [results[0]],
-            [results[1]],
-            [results[2]],
-            [results[3], results[4]],
-            [results[5], results[6]],
-            [results[7], results[8]],
-        ]
+        results, text_lines = full_receipt
         
         extractor = ReceiptExtractor()
         extracted = extractor.extract_all(results, text_lines)
@@ -278,3 +303,40 @@ class TestReceiptExtractor:
         assert extracted["merchant_name"] == "Unknown Store"
         assert extracted["transaction_date"] is None  # No date found
         assert extracted["total_amount_value"] == 100000.0
+
+    def test_grouped_lines_match_given_lines(self, full_receipt):
+        """Test the lines grouped by extract_all itself give the same fields."""
+        results, text_lines = full_receipt
+        
+        extractor = ReceiptExtractor()
+        assert extractor.extract_all(results) == extractor.extract_all(results, text_lines)
+    
+    def test_groups_lines_when_not_given(self):
+        """Test lines are grouped by vertical position when text_lines is omitted."""
+        results = [
+            create_ocr_result("Rp 55.000", 130),
+            create_ocr_result("INDOMARET", 10),
+            create_ocr_result("11/01/2026 14:30", 50),
+            # Left of the amount on the same line
+            OCRResult(text="Total", confidence=0.95, bbox=[-60, 120, -10, 140]),
+        ]
+        for i, r in enumerate(sorted(results, key=lambda r: r.center_y)):
+            r.line_index = i
+        
+        text_lines = [[results[1]], [results[2]], [results[3], results[0]]]
+        
+        extractor = ReceiptExtractor()
+        assert extractor.extract_all(results) == extractor.extract_all(results, text_lines)
+    
+    def test_batch_matches_list(self):
+        """Test an OCRBatch gives the same fields as its rows as a list."""
+        batch = OCRBatch(
+            ["TOKO ABC", "11/01/2026", "Total", "Rp 55.000"],
+            [0.9, 0.8, 0.7, 0.6],
+            [[[0, y], [100, y], [100, y + 20], [0, y + 20]] for y in (0, 30, 60, 60)],
+        )
+        batch.line_index[:] = [0, 1, 2, 2]
+        text_lines = [[batch[0]], [batch[1]], [batch[2], batch[3]]]
+        
+        extractor = ReceiptExtractor()
+        assert extractor.extract_all(batch, text_lines) == extractor.extract_all(list(batch), text_lines)
@@ -0,0 +1,234 @@
+"""
+Unit tests for OCR Engine module (result parsing and layout helpers).
+"""
+import pytest
+import numpy as np
+
+from app.ocr.ocr_engine import ReceiptOCR, OCRResult, OCRBatch, compute_box_geometry
+
+
+class FakePaddleOCR:
+    """Stand-in for PaddleOCR returning a canned result."""
+
+    def __init__(self, result):
+        self.result = result
+
+    def ocr(self, image):
+        self.image = image
+        return self.result
+
+
+def create_engine(result) -> ReceiptOCR:
+    """Helper to create a ReceiptOCR that returns a canned PaddleOCR result."""
+    engine = ReceiptOCR()
+    engine._ocr = FakePaddleOCR(result)
+    return engine
+
+
+def box(x1: float, y1: float, x2: float, y2: float) -> list:
+    """Helper to create a 4-point axis-aligned box."""
+    return [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]
+
+
+class TestOCRResult:
+    """Test cases for OCRResult geometry."""
+
+    def test_geometry_from_points(self):
+        """Test geometry is derived from the 4-point bbox."""
+        result = OCRResult(text="A", confidence=0.9, bbox=box(10, 20, 50, 40))
+        assert result.center_x == 30.0
+        assert result.center_y == 30.0
+        assert result.left_x == 10.0
+        assert result.right_x == 50.0
+
+    def test_geometry_from_flat_bbox(self):
+        """Test flat [x1,y1,...,x4,y4] bbox is normalized."""
+        result = OCRResult(text="A", confidence=0.9, bbox=[0, 0, 10, 0, 10, 10, 0, 10])
+        assert result.bbox == box(0, 0, 10, 10)
+        assert result.center_y == 5.0
+
+    def test_geometry_from_flat_tuple(self):
+        """Test a flat tuple bbox is normalized like a flat list."""
+        result = OCRResult(text="A", confidence=0.9, bbox=(0.0, 0.0, 10.0, 0.0, 10.0, 10.0, 0.0, 10.0))
+        assert result.bbox == box(0, 0, 10, 10)
+        assert result.center_y == 5.0
+
+    def test_no_instance_dict(self):
+        """Test results use slots, so stray attributes are rejected."""
+        result = OCRResult(text="A", confidence=0.9, bbox=box(0, 0, 10, 10))
+        assert not hasattr(result, "__dict__")
+        with pytest.raises(AttributeError):
+            result.extra = 1
+
+    def test_compute_box_geometry_batch(self):
+        """Test batched geometry matches per-result geometry."""
+        boxes = np.array([box(0, 0, 10, 10), box(20, 30, 40, 50)], dtype=np.float32)
+        center_x, center_y, left_x, right_x = compute_box_geometry(boxes)
+        assert center_x.tolist() == [5.0, 30.0]
+        assert center_y.tolist() == [5.0, 40.0]
+        assert left_x.tolist() == [0.0, 20.0]
+        assert right_x.tolist() == [10.0, 40.0]
+
+
+class TestOCRBatch:
+    """Test cases for the column-oriented OCRBatch."""
+
+    def test_rows_match_columns(self):
+        """Test row view exposes the same data as OCRResult."""
+        batch = OCRBatch(["A", "B"], [0.5, 0.75], [box(0, 0, 10, 10), box(20, 30, 40, 50)])
+        assert len(batch) == 2
+        assert batch[1].text == "B"
+        assert batch[1].confidence == 0.75
+        assert batch[1].center_y == 40.0
+        assert batch[1].bbox == box(20, 30, 40, 50)
+        assert [r.text for r in batch] == ["A", "B"]
+
+    def test_reorder(self):
+        """Test reorder permutes every column together."""
+        batch = OCRBatch(["A", "B"], [0.5, 0.75], [box(0, 0, 10, 10), box(20, 30, 40, 50)])
+        batch.reorder(np.array([1, 0]))
+        assert batch.texts == ["B", "A"]
+        assert batch.confidences.tolist() == [0.75, 0.5]
+        assert batch[0].left_x == 20.0
+
+    def test_from_results(self):
+        """Test packing OCRResult objects gives the same rows back."""
+        results = [
+            OCRResult(text="A", confidence=0.5, bbox=box(0, 0, 10, 10), line_index=1),
+            OCRResult(text="B", confidence=0.75, bbox=box(20, 30, 40, 50), line_index=0),
+        ]
+        batch = OCRBatch.from_results(results)
+        assert batch.texts == ["A", "B"]
+        assert batch.center_y.tolist() == [5.0, 40.0]
+        assert batch.line_index.tolist() == [1, 0]
+        assert [r.to_dict() for r in batch] == [r.to_dict() for r in results]
+
+    def test_empty_batch(self):
+        """Test an empty batch has no rows or lines."""
+        batch = OCRBatch([], [], [])
+        assert len(batch) == 0
+        assert batch.line_groups() == []
+
+
+class TestExtractText:
+    """Test cases for ReceiptOCR.extract_text result parsing."""
+
+    def test_paddlex_format_sorted_by_y(self):
+        """Test PaddleX dict results are sorted top-to-bottom with line indices."""
+        engine = create_engine([{
+            "rec_texts": ["Total", "TOKO ABC"],
+            "rec_scores": [0.8, 0.9],
+            "rec_polys": np.array([box(0, 100, 50, 120), box(0, 0, 80, 20)]),
+        }])
+        results = engine.extract_text(np.zeros((10, 10, 3), dtype=np.uint8))
+        assert [r.text for r in results] == ["TOKO ABC", "Total"]
+        assert [r.line_index for r in results] == [0, 1]
+        assert results[0].center_y == 10.0
+
+    def test_legacy_list_format(self):
+        """Test legacy [[bbox, (text, score)], ...] results."""
+        engine = create_engine([[
+            [box(0, 50, 40, 70), (" 50.000 ", 0.7)],
+            [box(0, 10, 40, 30), ("TOKO", 0.9)],
+        ]])
+        results = engine.extract_text(np.zeros((10, 10, 3), dtype=np.uint8))
+        assert [r.text for r in results] == ["TOKO", "50.000"]
+        assert results[1].confidence == 0.7
+
+    def test_grayscale_input_broadcast(self):
+        """Test single-channel images reach PaddleOCR as a 3-channel view."""
+        engine = create_engine([None])
+        gray = np.arange(12, dtype=np.uint8).reshape(3, 4)
+        engine.extract_text(gray)
+        assert engine._ocr.image.shape == (3, 4, 3)
+        assert np.shares_memory(engine._ocr.image, gray)
+
+    def test_no_text_detected(self):
+        """Test empty OCR output returns no results."""
+        engine = create_engine([None])
+        assert len(engine.extract_text(np.zeros((10, 10, 3), dtype=np.uint8))) == 0
+
+    def test_paddlex_list_of_box_arrays(self):
+        """Test PaddleX polygons given as a list of (4, 2) arrays."""
+        engine = create_engine([{
+            "rec_texts": ["A", "B"],
+            "rec_scores": [0.9, 0.8],
+            "rec_polys": [np.array(box(0, 0, 10, 10), dtype=np.int16),
+                          np.array(box(0, 40, 10, 60), dtype=np.int16)],
+        }])
+        results = engine.extract_text(np.zeros((10, 10, 3), dtype=np.uint8))
+        assert [r.center_y for r in results] == [5.0, 50.0]
+
+    def test_paddlex_missing_boxes(self):
+        """Test texts without a matching polygon get an empty box."""
+        engine = create_engine([{
+            "rec_texts": ["A", "B"],
+            "rec_scores": [0.9],
+            "rec_polys": [box(0, 40, 10, 60)],
+        }])
+        results = engine.extract_text(np.zeros((10, 10, 3), dtype=np.uint8))
+        assert [r.text for r in results] == ["B", "A"]
+        assert results[0].confidence == 0.0
+
+    def test_paddlex_missing_scores(self):
+        """Test texts without a matching score get zero confidence."""
+        engine = create_engine([{
+            "rec_texts": ["A", "B"],
+            "rec_scores": [0.9],
+            "rec_polys": np.array([box(0, 0, 10, 10), box(0, 40, 10, 60)]),
+        }])
+        results = engine.extract_text(np.zeros((10, 10, 3), dtype=np.uint8))
+        assert [r.confidence for r in results] == [0.9, 0.0]
+
+
+class TestGetTextLines:
+    """Test cases for ReceiptOCR.get_text_lines grouping."""
+
+    def test_groups_by_vertical_position(self):
+        """Test results within the threshold share a line, sorted left-to-right."""
+        results = [
+            OCRResult(text="TOKO", confidence=0.9, bbox=box(0, 0, 40, 20)),
+            OCRResult(text="150.000", confidence=0.9, bbox=box(80, 100, 140, 120)),
+            OCRResult(text="Total", confidence=0.9, bbox=box(0, 105, 40, 125)),
+        ]
+        lines = ReceiptOCR().get_text_lines(results)
+        assert [[r.text for r in line] for line in lines] == [["TOKO"], ["Total", "150.000"]]
+
+    def test_threshold_measured_from_line_start(self):
+        """Test drift is measured from the first result of the line, not the previous one."""
+        results = [
+            OCRResult(text=str(i), confidence=0.9, bbox=box(0, y - 5, 10, y + 5))
+            for i, y in enumerate([0, 15, 30, 45])
+        ]
+        lines = ReceiptOCR().get_text_lines(results, line_threshold=20.0)
+        assert [[r.text for r in line] for line in lines] == [["0", "1"], ["2", "3"]]
+
+    def test_empty_results(self):
+        """Test grouping no results returns no lines."""
+        assert ReceiptOCR().get_text_lines([]) == []
+
+
+class TestGetFullText:
+    """Test cases for ReceiptOCR.get_full_text."""
+
+    def test_batch_and_list_agree(self):
+        """Test full text is the same for a batch and its rows."""
+        batch = OCRBatch(
+            ["150.000", "TOKO", "Total"],
+            [0.9, 0.9, 0.9],
+            [box(80, 100, 140, 120), box(0, 0, 40, 20), box(0, 105, 40, 125)],
+        )
+        batch.reorder(np.argsort(batch.center_y, kind="stable"))
+        engine = ReceiptOCR()
+        assert engine.get_full_text(batch) == "TOKO\nTotal 150.000"
+        assert engine.get_full_text(list(batch)) == "TOKO\nTotal 150.000"
+
+    def test_from_lines_matches_results(self):
+        """Test joining precomputed lines gives the same text as grouping results."""
+        results = [
+            OCRResult(text="TOKO", confidence=0.9, bbox=box(0, 0, 40, 20)),
+            OCRResult(text="Total", confidence=0.9, bbox=box(0, 105, 40, 125)),
+        ]
+        engine = ReceiptOCR()
+        lines = engine.get_text_lines(results)
+        assert engine.get_full_text_from_lines(lines) == engine.get_full_text(results) == "TOKO\nTotal"
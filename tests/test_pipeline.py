@@ -0,0 +1,89 @@
+"""
+Unit tests for the queue-based receipt pipeline.
+"""
+import asyncio
+
+import cv2
+import numpy as np
+
+from app.api.pipeline import ReceiptPipeline
+from app.ocr.ocr_engine import ReceiptOCR
+from app.parsing.extractors import ReceiptExtractor
+from app.preprocessing.preprocessor import ReceiptPreprocessor
+
+
+PAGE = {
+    "rec_texts": ["TOKO ABC", "Total Rp 25.000"],
+    "rec_scores": [0.9, 0.9],
+    "rec_polys": np.array([
+        [[0, 0], [80, 0], [80, 20], [0, 20]],
+        [[0, 100], [120, 100], [120, 120], [0, 120]],
+    ]),
+}
+
+
+class FakePaddleOCR:
+    """Stand-in for PaddleOCR that records how many images each call received."""
+
+    def __init__(self):
+        self.calls = []
+
+    def ocr(self, images):
+        if isinstance(images, list):
+            self.calls.append(len(images))
+            return [PAGE for _ in images]
+        self.calls.append(1)
+        return [PAGE]
+
+
+def create_pipeline(**kwargs):
+    """Helper to create a pipeline around a fake PaddleOCR."""
+    engine = ReceiptOCR()
+    engine._ocr = FakePaddleOCR()
+    pipeline = ReceiptPipeline(ReceiptPreprocessor(), engine, ReceiptExtractor(), **kwargs)
+    return pipeline, engine._ocr
+
+
+def receipt_bytes() -> bytes:
+    """Helper to encode a blank receipt-sized image."""
+    ok, buf = cv2.imencode(".png", np.full((200, 150, 3), 255, dtype=np.uint8))
+    return buf.tobytes()
+
+
+async def run_requests(pipeline, payloads, with_text=False):
+    """Start the pipeline, submit payloads concurrently and stop it again."""
+    pipeline.start()
+    try:
+        return await asyncio.gather(
+            *(pipeline.submit(p, with_text=with_text) for p in payloads),
+            return_exceptions=True
+        )
+    finally:
+        await pipeline.stop()
+
+
+class TestReceiptPipeline:
+    """Test cases for ReceiptPipeline."""
+
+    def test_single_receipt(self):
+        """Test one receipt flows through all stages."""
+        pipeline, _ = create_pipeline()
+        [(extracted, full_text)] = asyncio.run(run_requests(pipeline, [receipt_bytes()], with_text=True))
+        assert extracted["merchant_name"] == "TOKO ABC"
+        assert extracted["total_amount_value"] == 25000.0
+        assert full_text == "TOKO ABC\nTotal Rp 25.000"
+
+    def test_concurrent_receipts_are_batched(self):
+        """Test receipts arriving together share OCR calls."""
+        pipeline, fake = create_pipeline(ocr_batch_size=4, ocr_batch_wait_ms=200)
+        results = asyncio.run(run_requests(pipeline, [receipt_bytes()] * 4))
+        assert all(extracted["merchant_name"] == "TOKO ABC" for extracted, _ in results)
+        assert sum(fake.calls) == 4
+        assert len(fake.calls) < 4
+
+    def test_bad_image_fails_only_its_request(self):
+        """Test a decode error is raised to its caller without stopping the pipeline."""
+        pipeline, _ = create_pipeline()
+        bad, good = asyncio.run(run_requests(pipeline, [b"not an image", receipt_bytes()]))
+        assert isinstance(bad, ValueError)
+        assert good[0]["merchant_name"] == "TOKO ABC"
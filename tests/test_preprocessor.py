@@ -0,0 +1,93 @@
+"""
+Unit tests for the image preprocessing module.
+"""
+import cv2
+import numpy as np
+import pytest
+
+from app.preprocessing.preprocessor import ReceiptPreprocessor, load_image_from_bytes
+
+
+def create_receipt(angle: float = 0.0) -> np.ndarray:
+    """Helper to render rows of dark text on light paper, rotated by angle degrees."""
+    image = np.full((600, 400), 235, dtype=np.uint8)
+    for i, y in enumerate(range(40, 560, 40)):
+        cv2.putText(image, f"ITEM {i} 12.500", (20, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, 20, 2)
+    if angle:
+        matrix, size = ReceiptPreprocessor._rotation_for(-angle, 400, 600)
+        image = cv2.warpAffine(image, matrix, size, borderMode=cv2.BORDER_REPLICATE)
+    return image
+
+
+class TestDeskew:
+    """Test cases for skew detection."""
+
+    @pytest.mark.parametrize("angle", [-6.0, -2.5, 3.0, 7.5])
+    def test_projection_angle(self, angle):
+        """Test the projection profile recovers the rotation applied to text rows."""
+        assert ReceiptPreprocessor()._projection_angle(create_receipt(angle)) == pytest.approx(angle, abs=0.3)
+
+    def test_projection_level_text(self):
+        """Test level text is left alone."""
+        assert ReceiptPreprocessor()._projection_angle(create_receipt()) is None
+
+    def test_projection_blank_image(self):
+        """Test an image without text is left alone."""
+        assert ReceiptPreprocessor()._projection_angle(np.full((300, 200), 200, dtype=np.uint8)) is None
+
+    @pytest.mark.parametrize("shape", [(-1, 1, 4), (-1, 4)])
+    def test_median_line_angle(self, shape):
+        """Test Hough segments in either OpenCV layout give the median near-horizontal angle."""
+        lines = np.array([
+            [0, 0, 100, 5],     # ~2.9°
+            [0, 0, 100, 3],     # ~1.7°
+            [0, 0, 100, 4],     # ~2.3°
+            [10, 0, 10, 100],   # vertical, ignored
+            [0, 0, 100, 200],   # steep, ignored
+        ], dtype=np.int32).reshape(shape)
+        assert ReceiptPreprocessor._median_line_angle(lines) == pytest.approx(np.degrees(np.arctan2(4, 100)))
+
+
+class TestProcess:
+    """Test cases for the full preprocessing pipeline."""
+
+    def test_returns_grayscale(self):
+        """Test a BGR input comes back as a single-channel uint8 image."""
+        image = cv2.cvtColor(create_receipt(), cv2.COLOR_GRAY2BGR)
+        processed = ReceiptPreprocessor().process(image)
+        assert processed.shape == (600, 400)
+        assert processed.dtype == np.uint8
+
+    def test_empty_image(self):
+        """Test an empty image is rejected."""
+        with pytest.raises(ValueError):
+            ReceiptPreprocessor().process(np.zeros((0, 0, 3), dtype=np.uint8))
+
+    def test_non_uint8_image(self):
+        """Test wider pixel types are rejected instead of processed at 4x the bytes."""
+        with pytest.raises(ValueError):
+            ReceiptPreprocessor().process(create_receipt().astype(np.float32))
+
+    def test_process_batch(self):
+        """Test a batch gives the same images, in order, as processing one at a time."""
+        images = [create_receipt(angle) for angle in (0.0, 3.0, -2.5)]
+        preprocessor = ReceiptPreprocessor()
+        try:
+            batch = preprocessor.process_batch(images)
+        finally:
+            preprocessor.close()
+        expected = [ReceiptPreprocessor().process(image) for image in images]
+        assert len(batch) == len(expected)
+        for processed, single in zip(batch, expected):
+            np.testing.assert_array_equal(processed, single)
+
+
+class TestLoadImage:
+    """Test cases for decoding uploads."""
+
+    def test_grayscale_decode_and_cap(self):
+        """Test an oversize color upload decodes to one channel within the size cap."""
+        ok, buf = cv2.imencode(".png", np.full((2000, 1000, 3), 200, dtype=np.uint8))
+        image = load_image_from_bytes(buf.tobytes(), grayscale=True)
+        assert image.shape == (1280, 640)
+        assert image.dtype == np.uint8